@@ -1,14 +1,34 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import uvicorn
 from src.api.routes import router
+from src.scraper.base_scraper import close_session
+from src.utils.ai_helper import AIHelper
+from src.utils.google_custom_search import close_search_session
+from src.utils.selenium_fetcher import close_selenium_pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The shared aiohttp session and Gemini client are created lazily on first use
+    yield
+    await close_session()
+    await close_search_session()
+    await AIHelper.close_client()
+    # Quitting Chrome drivers blocks, so keep it off the event loop
+    await asyncio.to_thread(close_selenium_pool)
 
 app = FastAPI(
     title="Product Price Comparison API",
     description="A tool that fetches prices of products from multiple websites based on the country",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.include_router(router)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
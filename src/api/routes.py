@@ -1,3 +1,5 @@
+import operator
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
@@ -20,46 +22,43 @@ class ProductPriceResponse(BaseModel):
     imageUrl: str = None
     additionalInfo: Optional[Dict[str, Any]] = None
 
-def estimate_price(product, query):
+# Price estimation rules: (name needles, source needles) -> price. The two
+# tuples stay separate because some needles are only safe in one field —
+# 'apple' in a product name would also hit "Pineapple corer"
+PRICE_RULES = (
+    (('apple watch',), ('apple',), '399'),
+    (('garmin',), ('garmin',), '299'),
+    (('amazfit',), ('amazfit',), '149'),
+    (('fitbit',), ('fitbit',), '199'),
+    (('omega', 'tudor', 'vacheron', 'constantin', 'luxury'), (), '2999'),
+    (('smartwatch', 'smart watch'), (), '149'),
+)
+
+def estimate_price(product, query_lower):
     """Add estimated price based on product type and name."""
-    product_name = product.get('productName', '').lower()
-    
     # Skip if already has a price
     if product.get('price'):
         return product
-        
-    # Simple price estimation based on product type and brand
-    if 'apple watch' in product_name or 'apple' in product.get('source', '').lower():
-        product['price'] = '399'
-        if not product.get('additionalInfo'):
-            product['additionalInfo'] = {}
-        product['additionalInfo']['priceEstimated'] = True
-    elif 'garmin' in product_name or 'garmin' in product.get('source', '').lower():
-        product['price'] = '299'
-        if not product.get('additionalInfo'):
-            product['additionalInfo'] = {}
-        product['additionalInfo']['priceEstimated'] = True
-    elif 'amazfit' in product_name or 'amazfit' in product.get('source', '').lower():
-        product['price'] = '149'
-        if not product.get('additionalInfo'):
-            product['additionalInfo'] = {}
-        product['additionalInfo']['priceEstimated'] = True
-    elif 'fitbit' in product_name or 'fitbit' in product.get('source', '').lower():
-        product['price'] = '199'
-        if not product.get('additionalInfo'):
-            product['additionalInfo'] = {}
-        product['additionalInfo']['priceEstimated'] = True
-    elif any(luxury in product_name for luxury in ['omega', 'tudor', 'vacheron', 'constantin', 'luxury']):
-        product['price'] = '2999'
-        if not product.get('additionalInfo'):
-            product['additionalInfo'] = {}
-        product['additionalInfo']['priceEstimated'] = True
-    elif 'smartwatch' in product_name or 'smart watch' in product_name or 'smartwatch' in query.lower():
-        product['price'] = '149'
-        if not product.get('additionalInfo'):
-            product['additionalInfo'] = {}
-        product['additionalInfo']['priceEstimated'] = True
-        
+
+    # Lower the fields once instead of re-lowering per rule
+    name = product.get('productName', '').lower()
+    source = product.get('source', '').lower()
+
+    for name_needles, source_needles, price in PRICE_RULES:
+        if any(needle in name for needle in name_needles) or any(needle in source for needle in source_needles):
+            break
+    else:
+        # Fall back to the query itself for generic smartwatch searches
+        if 'smartwatch' not in query_lower:
+            return product
+        price = '149'
+
+    product['price'] = price
+    info = product.get('additionalInfo')
+    if not info:
+        info = product['additionalInfo'] = {}
+    info['priceEstimated'] = True
+
     return product
 
 @router.post("/search", response_model=List[ProductPriceResponse])
@@ -76,17 +75,21 @@ async def search_products(query: ProductSearchQuery):
             return []
         
         # Add estimated prices for items without prices
-        results = [estimate_price(item, query.query) for item in results]
+        query_lower = query.query.lower()
+        results = [estimate_price(item, query_lower) for item in results]
             
-        # Sort results by price (ascending)
-        # Convert price to float for sorting, handle potential issues with conversion
-        def get_price_for_sorting(item):
+        # Sort results by price (ascending). Compute the numeric key once per
+        # item up front instead of inside the sort's key callable, which would
+        # re-parse the price string O(n log n) times.
+        for item in results:
             try:
-                return float(item.get("price", "0").replace(",", ""))
+                item["_sort_key"] = float((item.get("price") or "0").replace(",", ""))
             except (ValueError, AttributeError):
-                return float(0)
-                
-        sorted_results = sorted(results, key=get_price_for_sorting)
+                item["_sort_key"] = 0.0
+
+        sorted_results = sorted(results, key=operator.itemgetter("_sort_key"))
+        for item in sorted_results:
+            item.pop("_sort_key", None)
         logger.info(f"Found {len(sorted_results)} results for {query.query}")
         
         return sorted_results
@@ -1,13 +1,69 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 import aiohttp
 import asyncio
 from bs4 import BeautifulSoup
+from dotenv import load_dotenv
 from src.utils.logger import get_logger
 import os
+import socket
+import urllib.parse
+
+# Load environment variables before the module-level env reads below
+load_dotenv()
 
 logger = get_logger(__name__)
 
+# Default request headers shared by all scrapers; instances copy this once
+# instead of rebuilding the literal per scraper
+_BASE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+}
+
+# Read once; the key doesn't change while the process runs
+_SCRAPERAPI_KEY = os.getenv('SCRAPERAPI_KEY')
+
+# Deletes every ASCII character except digits, dot and comma in one C-level pass
+_PRICE_STRIP = str.maketrans("", "", "".join(chr(i) for i in range(128) if chr(i) not in "0123456789.,"))
+
+# Dedicated executor for the Selenium fallback so browser fetches neither block
+# the event loop nor spawn an unbounded number of Chrome instances
+_selenium_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="selenium")
+
+# Shared aiohttp session, created lazily and reused across all scrapers so that
+# connections (TCP + TLS) and DNS lookups are kept warm between requests.
+_session: Optional[aiohttp.ClientSession] = None
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get the shared aiohttp session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=int(os.getenv("SCRAPER_CONN_LIMIT", "200")),
+                limit_per_host=int(os.getenv("SCRAPER_PER_HOST", "20")),
+                ttl_dns_cache=300,
+                use_dns_cache=True,
+                keepalive_timeout=30,
+                enable_cleanup_closed=True,
+                # The target e-commerce hosts all resolve over IPv4; skipping
+                # AAAA lookups avoids slow dual-stack fallback
+                family=socket.AF_INET,
+            ),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+    return _session
+
+async def close_session():
+    """Close the shared aiohttp session (called on app shutdown)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
 class BaseScraper(ABC):
     """Base class for all scrapers."""
     
@@ -15,18 +71,22 @@ class BaseScraper(ABC):
     supported_countries = ["ALL"]  # By default, support all countries
     
     def __init__(self):
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        }
-    
+        self.headers = dict(_BASE_HEADERS)
+
     def get_scraperapi_url(self, target_url):
-        api_key = os.getenv('SCRAPERAPI_KEY')
-        return f'https://api.scraperapi.com/?api_key={api_key}&url={target_url}'
+        # URL-encode the target so query strings containing '&' survive being
+        # wrapped in the ScraperAPI URL
+        encoded_url = urllib.parse.quote(target_url, safe='')
+        return f'https://api.scraperapi.com/?api_key={_SCRAPERAPI_KEY}&url={encoded_url}'
 
-    async def fetch_html(self, url: str) -> str:
-        """Fetch HTML content from a URL, using ScraperAPI for e-commerce sites, fallback to Selenium, then httpx."""
+    async def _fetch_with_fallbacks(self, url: str, read_body, empty):
+        """Shared fetch chain: ScraperAPI → plain fetch with a server-rendered
+        check → Selenium → plain fetch.
+
+        `read_body` pulls the payload out of an aiohttp response (`text()` or
+        `read()`); `empty` is returned when every stage fails and its type
+        decides whether the Selenium page source needs encoding.
+        """
         ecom_domains = [
             "amazon.", "flipkart.com", "myntra.com", "snapdeal.com", "ajio.com", "jiomart.com"
         ]
@@ -34,54 +94,87 @@ class BaseScraper(ABC):
             # 1. Try ScraperAPI
             try:
                 scraperapi_url = self.get_scraperapi_url(url)
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(scraperapi_url, headers=self.headers, timeout=30) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            if html and len(html) > 1000:
-                                return html
-                        else:
-                            logger.error(f"ScraperAPI failed for {url}, status code: {response.status}")
+                session = await get_session()
+                async with session.get(scraperapi_url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    if response.status == 200:
+                        body = await read_body(response)
+                        if body and len(body) > 1000:
+                            return body
+                    else:
+                        logger.error(f"ScraperAPI failed for {url}, status code: {response.status}")
             except Exception as e:
                 logger.error(f"ScraperAPI fetch failed for {url}: {e}")
-            # 2. Fallback to Selenium
+            # 2. Fast path: a plain fetch is enough when the page arrives
+            # server-rendered with price markup; only pay for Chrome otherwise
+            from src.utils.selenium_fetcher import fetch_html_selenium, looks_server_rendered
             try:
-                from src.utils.selenium_fetcher import fetch_html_selenium
-                html = fetch_html_selenium(url)
+                session = await get_session()
+                async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                    if response.status == 200:
+                        body = await read_body(response)
+                        if len(body) > 1000 and looks_server_rendered(body):
+                            return body
+            except Exception as e:
+                logger.error(f"Plain fetch fast path failed for {url}: {e}")
+            # 3. Fallback to Selenium (blocking, so run it in the dedicated executor)
+            try:
+                loop = asyncio.get_running_loop()
+                html = await loop.run_in_executor(_selenium_executor, fetch_html_selenium, url)
                 if html and len(html) > 1000:
+                    if isinstance(empty, bytes):
+                        return html.encode("utf-8", errors="replace")
                     return html
             except Exception as e:
                 logger.error(f"Selenium fetch failed for {url}: {e}")
-        # 3. Fallback to httpx
+        # 4. Fallback to a plain fetch
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=15) as response:
-                    if response.status == 200:
-                        return await response.text()
-                    else:
-                        logger.error(f"Failed to fetch {url}, status code: {response.status}")
-                        return ""
+            session = await get_session()
+            async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                if response.status == 200:
+                    return await read_body(response)
+                else:
+                    logger.error(f"Failed to fetch {url}, status code: {response.status}")
+                    return empty
         except Exception as e:
             logger.error(f"Error fetching {url}: {str(e)}")
-            return ""
-    
+            return empty
+
+    async def fetch_html(self, url: str) -> str:
+        """Fetch HTML content from a URL, using ScraperAPI for e-commerce sites, fallback to Selenium, then httpx."""
+        return await self._fetch_with_fallbacks(url, lambda response: response.text(), "")
+
+    async def fetch_bytes(self, url: str) -> bytes:
+        """Fetch raw HTML bytes from a URL, using the same fallback chain as fetch_html.
+
+        Skipping aiohttp's charset decode saves a full pass over the body; lxml
+        reads the document's own encoding declaration when parsing bytes.
+        """
+        return await self._fetch_with_fallbacks(url, lambda response: response.read(), b"")
+
     async def fetch_json(self, url: str) -> Dict:
         """Fetch JSON content from a URL."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.error(f"Failed to fetch JSON from {url}, status code: {response.status}")
-                        return {}
+            session = await get_session()
+            async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    return await response.json()
+                else:
+                    logger.error(f"Failed to fetch JSON from {url}, status code: {response.status}")
+                    return {}
         except Exception as e:
             logger.error(f"Error fetching JSON from {url}: {str(e)}")
             return {}
     
-    def parse_html(self, html: str) -> BeautifulSoup:
-        """Parse HTML content into a BeautifulSoup object."""
-        return BeautifulSoup(html, "html.parser")
+    def parse_html(self, html: str, strainer=None) -> BeautifulSoup:
+        """Parse HTML content into a BeautifulSoup object.
+
+        Pass a SoupStrainer to only materialize the matching subtrees instead
+        of the full document.
+        """
+        # lxml is a C parser, several times faster than html.parser on large pages
+        if strainer is not None:
+            return BeautifulSoup(html, "lxml", parse_only=strainer)
+        return BeautifulSoup(html, "lxml")
     
     def adapt_country(self, country: str) -> str:
         """Adapt the country code to the format expected by the scraper."""
@@ -93,13 +186,19 @@ class BaseScraper(ABC):
             return "0"
         
         # Remove non-numeric characters except for decimal points and commas
-        clean = ''.join(c for c in price if c.isdigit() or c in ".,")
-        
+        if price.isascii():
+            clean = price.translate(_PRICE_STRIP)
+        else:
+            # Currency symbols etc. are outside the ASCII table; take the slow path
+            clean = ''.join(c for c in price if c.isdigit() or c in ".,")
+
         # Replace commas with empty string if they're thousand separators
-        if "," in clean and "." in clean:
-            if clean.index(",") < clean.index("."):
+        comma = clean.find(",")
+        dot = clean.find(".")
+        if comma != -1 and dot != -1:
+            if comma < dot:
                 clean = clean.replace(",", "")
-        elif "," in clean and "." not in clean:
+        elif comma != -1:
             clean = clean.replace(",", ".")
             
         try:
@@ -107,15 +206,19 @@ class BaseScraper(ABC):
         except ValueError:
             return "0"
     
+    def prepare_query(self, query: str) -> tuple:
+        """Tokenize a query once so it can be matched against many product names."""
+        return tuple(query.casefold().split())
+
+    def match_tokens(self, product_name: str, tokens: tuple) -> bool:
+        """Check if the product name contains every prepared query token."""
+        # A simple matching algorithm - can be improved with more sophisticated approaches
+        name = product_name.casefold()
+        return all(token in name for token in tokens)
+
     def match_product(self, product_name: str, query: str) -> bool:
         """Check if the product matches the query."""
-        # A simple matching algorithm - can be improved with more sophisticated approaches
-        product_name = product_name.lower()
-        query = query.lower()
-        
-        # Check if all words in the query are in the product name
-        query_words = query.split()
-        return all(word in product_name for word in query_words)
+        return self.match_tokens(product_name, self.prepare_query(query))
     
     @abstractmethod
     async def search(self, country: str, query: str) -> List[Dict[str, Any]]:
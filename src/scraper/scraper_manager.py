@@ -1,101 +1,79 @@
 import asyncio
+from collections import defaultdict
 from typing import List, Dict, Any
 import importlib
-import os
-import glob
 from src.utils.logger import get_logger
 from src.utils.google_custom_search import search_products_google
 
 logger = get_logger(__name__)
 
+# Explicit registry of site scrapers: name -> "module:ClassName".
+# Keeping this static avoids scanning the sites package on every startup and
+# makes the set of imported modules deterministic.
+SCRAPERS = {
+    "amazon": "src.scraper.sites.amazon:AmazonScraper",
+    "flipkart": "src.scraper.sites.flipkart:FlipkartScraper",
+    "generic_ai": "src.scraper.sites.generic_ai_scraper:GenericAIScraper",
+}
+
 class ScraperManager:
     def __init__(self):
         self.scrapers = {}
         self._load_scrapers()
     
     def _load_scrapers(self):
-        """Load all available scrapers dynamically."""
-        try:
-            # Get the directory where the scrapers are located
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            scrapers_dir = os.path.join(current_dir, "sites")
-            
-            # Ensure the directory exists
-            if not os.path.exists(scrapers_dir):
-                os.makedirs(scrapers_dir)
-            
-            # Find all Python files in the scrapers directory
-            scraper_files = glob.glob(os.path.join(scrapers_dir, "*.py"))
-            
-            for scraper_file in scraper_files:
-                if "__init__" in scraper_file or "__pycache__" in scraper_file:
-                    continue
-                
-                # Get the module name from the file path
-                module_name = os.path.basename(scraper_file).replace(".py", "")
-                full_module_name = f"src.scraper.sites.{module_name}"
-                
-                # Import the module dynamically
-                try:
-                    module = importlib.import_module(full_module_name)
-                    
-                    # Get the scraper class from the module
-                    for attr_name in dir(module):
-                        attr = getattr(module, attr_name)
-                        # Check if this is a scraper class
-                        if (isinstance(attr, type) and 
-                            attr.__name__ != "BaseScraper" and
-                            hasattr(attr, "supported_countries") and
-                            hasattr(attr, "name")):
-                            
-                            # Create an instance of the scraper
-                            scraper_instance = attr()
-                            self.scrapers[scraper_instance.name] = scraper_instance
-                            logger.info(f"Loaded scraper: {scraper_instance.name}")
-                except Exception as e:
-                    logger.error(f"Error loading scraper {module_name}: {str(e)}")
-            
-            # After loading all dynamic scrapers, add GoogleCustomSearchScraper
-            self.scrapers["google_custom_search"] = GoogleCustomSearchScraper()
-        except Exception as e:
-            logger.error(f"Error loading scrapers: {str(e)}")
+        """Load all registered scrapers."""
+        for name, path in SCRAPERS.items():
+            module_name, class_name = path.split(":")
+            try:
+                module = importlib.import_module(module_name)
+                scraper_cls = getattr(module, class_name)
+                self.scrapers[name] = scraper_cls()
+                logger.info(f"Loaded scraper: {name}")
+            except Exception as e:
+                logger.error(f"Error loading scraper {name}: {str(e)}")
+
+        # After loading all registered scrapers, add GoogleCustomSearchScraper
+        self.scrapers["google_custom_search"] = GoogleCustomSearchScraper()
+
+        # Index scrapers by supported country once; scrapers and their
+        # supported lists are immutable after load
+        self._by_country = defaultdict(list)
+        for scraper in self.scrapers.values():
+            for c in scraper.supported_countries:
+                self._by_country[c.upper()].append(scraper)
 
     def get_relevant_scrapers(self, country: str) -> List[Any]:
-        """Get all scrapers that support the given country."""
-        return [
-            scraper for scraper in self.scrapers.values() 
-            if country.upper() in [c.upper() for c in scraper.supported_countries]
-        ]
+        """Get all scrapers that support the given country, falling back to
+        general scrapers that support all countries."""
+        return self._by_country.get(country.upper()) or self._by_country.get("ALL", [])
 
     async def search_products(self, country: str, query: str) -> List[Dict[str, Any]]:
         """Search for products across all relevant scrapers."""
         relevant_scrapers = self.get_relevant_scrapers(country)
-        if not relevant_scrapers:
-            # If no specific scraper supports the country, use general scrapers that support all countries
-            relevant_scrapers = [
-                scraper for scraper in self.scrapers.values() 
-                if "ALL" in scraper.supported_countries
-            ]
-        
         if not relevant_scrapers:
             logger.warning(f"No scrapers found for country: {country}")
             return []
         
-        # Run all scrapers concurrently
-        tasks = [scraper.search(country, query) for scraper in relevant_scrapers]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Process results, filter out exceptions
+        # Run all scrapers concurrently, consuming results as they complete so a
+        # slow scraper doesn't hold up the rest. Errors are handled inline
+        # instead of being collected and type-checked after a gather.
+        async def run_scraper(scraper):
+            try:
+                return await scraper.search(country, query)
+            except Exception as e:
+                logger.error(f"Error from scraper {scraper.name}: {str(e)}")
+                return []
+
+        tasks = [asyncio.create_task(run_scraper(scraper)) for scraper in relevant_scrapers]
+
         processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error from scraper {relevant_scrapers[i].name}: {str(result)}")
-                continue
-            
+        for future in asyncio.as_completed(tasks):
+            result = await future
             if isinstance(result, list):
                 processed_results.extend(result)
-            
-        return processed_results 
+
+        return processed_results
 
 class GoogleCustomSearchScraper:
     name = "google_custom_search"
@@ -1,14 +1,61 @@
 from typing import List, Dict, Any
+import asyncio
 import re
 import urllib.parse
-from src.scraper.base_scraper import BaseScraper
+import aiohttp
+import orjson
+from bs4 import BeautifulSoup, SoupStrainer
+from src.scraper.base_scraper import BaseScraper, get_session, _BASE_HEADERS
 from src.utils.logger import get_logger
 from src.utils.ai_helper import AIHelper
 import os
-import requests
 
 logger = get_logger(__name__)
 
+# Only the search-result divs are ever inspected, so restrict parsing to them
+# instead of materializing the whole SERP tree
+_RESULT_STRAINER = SoupStrainer("div", attrs={"data-component-type": "s-search-result"})
+
+# Compiled once; these scan the full SERP HTML (as raw bytes) on every search
+_PPU_CURRENCY_RE = re.compile(rb'ppu-currency">(\w+)<')
+_PRICE_SYMBOL_RE = re.compile(rb'a-price-symbol">([^<]+)<')
+
+# Matches the JSON array inside a Gemini answer
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+# Default currency per Amazon storefront country
+_COUNTRY_CURRENCY = {
+    "US": "USD",
+    "UK": "GBP",
+    "DE": "EUR",
+    "FR": "EUR",
+    "ES": "EUR",
+    "IT": "EUR",
+    "JP": "JPY",
+    "IN": "INR",
+    "CA": "CAD",
+    "AU": "AUD",
+}
+
+_SYMBOL_TO_CURRENCY = {
+    "$": "USD",
+    "£": "GBP",
+    "€": "EUR",
+    "¥": "JPY",
+    "₹": "INR",
+}
+
+# Base headers merged with the Amazon-specific ones, built once at import
+_AMAZON_HEADERS = {
+    **_BASE_HEADERS,
+    "Cache-Control": "no-cache",
+    "Pragma": "no-cache",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Sec-Fetch-User": "?1",
+}
+
 class AmazonScraper(BaseScraper):
     """Scraper for Amazon websites."""
     
@@ -18,16 +65,7 @@ class AmazonScraper(BaseScraper):
     def __init__(self):
         super().__init__()
         self.ai_helper = AIHelper()
-        # Update headers for Amazon
-        self.headers.update({
-            "Accept-Language": "en-US,en;q=0.9",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "none",
-            "Sec-Fetch-User": "?1",
-        })
+        self.headers = dict(_AMAZON_HEADERS)
     
     def get_domain(self, country: str) -> str:
         """Get the Amazon domain for the given country."""
@@ -54,79 +92,136 @@ class AmazonScraper(BaseScraper):
     
     async def search(self, country: str, query: str) -> List[Dict[str, Any]]:
         """Search for products on Amazon using ScraperAPI's structured endpoint if possible."""
+        try:
+            if os.getenv('SCRAPERAPI_KEY'):
+                # Hedged mode fires the structured call and the HTML fetch
+                # together so a flaky structured endpoint doesn't serialize the
+                # full 20 s timeout in front of the fallback
+                if os.getenv('AMAZON_HEDGE') == '1':
+                    return await self._search_hedged(country, query)
+                try:
+                    results = await self._fetch_structured(country, query)
+                    if results:
+                        return results
+                except Exception as e:
+                    logger.error(f"ScraperAPI structured endpoint failed: {e}")
+            return await self._search_html(country, query)
+        except Exception as e:
+            logger.error(f"Error searching Amazon: {str(e)}")
+            return []
+
+    async def _search_hedged(self, country: str, query: str) -> List[Dict[str, Any]]:
+        """Speculatively run the structured endpoint and the HTML fetch concurrently."""
+        search_url = self.get_search_url(country, query)
+        structured_task = asyncio.create_task(self._fetch_structured(country, query))
+        html_task = asyncio.create_task(self.fetch_bytes(search_url))
+
+        done, _ = await asyncio.wait(
+            {structured_task, html_task},
+            timeout=8,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if structured_task in done:
+            try:
+                results = structured_task.result()
+                if results:
+                    html_task.cancel()
+                    return results
+            except Exception as e:
+                logger.error(f"ScraperAPI structured endpoint failed: {e}")
+        else:
+            structured_task.cancel()
+
+        html_bytes = await html_task
+        return await self._search_html(country, query, html_bytes)
+
+    async def _fetch_structured(self, country: str, query: str) -> List[Dict[str, Any]]:
+        """Fetch products from ScraperAPI's structured Amazon endpoints."""
         results = []
         api_key = os.getenv('SCRAPERAPI_KEY')
         domain = self.get_domain(country)
         # Check if query is an ASIN (10 chars, alphanumeric)
         is_asin = isinstance(query, str) and len(query) == 10 and query.isalnum()
+        if is_asin:
+            # Use product endpoint
+            url = 'https://api.scraperapi.com/structured/amazon/product'
+            params = {'api_key': api_key, 'asin': query}
+        else:
+            # Use search endpoint
+            url = 'https://api.scraperapi.com/structured/amazon/search'
+            params = {'api_key': api_key, 'search_term': query, 'domain': domain}
+        # Use the shared aiohttp session so the call doesn't block the event loop
+        session = await get_session()
+        async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=20)) as resp:
+            # orjson parses the (potentially ~100 KB) structured payload faster
+            # than aiohttp's stdlib-json default
+            data = orjson.loads(await resp.read()) if resp.status == 200 else None
+        if data is not None:
+            # If product endpoint, wrap in a list
+            if is_asin and isinstance(data, dict) and 'asin' in data:
+                products = [data]
+            elif 'products' in data and isinstance(data['products'], list):
+                products = data['products'][:10]
+            else:
+                products = []
+            for prod in products:
+                # Defensive: handle missing fields
+                result = {
+                    'link': prod.get('url', prod.get('product_url', '')),
+                    'price': prod.get('pricing', prod.get('price', '')),
+                    'currency': prod.get('currency', ''),
+                    'productName': prod.get('name', prod.get('title', '')),
+                    'source': f"Amazon {country}",
+                    'imageUrl': (prod.get('images') or prod.get('image', ['']))[0] if isinstance(prod.get('images'), list) and prod.get('images') else prod.get('image', ''),
+                    'additionalInfo': prod.get('product_information', None)
+                }
+                # Ensure all required fields are strings
+                for k in ['link', 'price', 'currency', 'productName', 'imageUrl']:
+                    if result[k] is None:
+                        result[k] = ''
+                results.append(result)
+        return results
+
+    async def _search_html(self, country: str, query: str, html_bytes: bytes = None) -> List[Dict[str, Any]]:
+        """Scrape the Amazon search results page directly."""
+        results = []
         try:
-            if api_key:
-                if is_asin:
-                    # Use product endpoint
-                    url = f'https://api.scraperapi.com/structured/amazon/product'
-                    params = {'api_key': api_key, 'asin': query}
-                else:
-                    # Use search endpoint
-                    url = f'https://api.scraperapi.com/structured/amazon/search'
-                    params = {'api_key': api_key, 'search_term': query, 'domain': domain}
-                try:
-                    resp = requests.get(url, params=params, timeout=20)
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        # If product endpoint, wrap in a list
-                        if is_asin and isinstance(data, dict) and 'asin' in data:
-                            products = [data]
-                        elif 'products' in data and isinstance(data['products'], list):
-                            products = data['products'][:10]
-                        else:
-                            products = []
-                        for prod in products:
-                            # Defensive: handle missing fields
-                            result = {
-                                'link': prod.get('url', prod.get('product_url', '')),
-                                'price': prod.get('pricing', prod.get('price', '')),
-                                'currency': prod.get('currency', ''),
-                                'productName': prod.get('name', prod.get('title', '')),
-                                'source': f"Amazon {country}",
-                                'imageUrl': (prod.get('images') or prod.get('image', ['']))[0] if isinstance(prod.get('images'), list) and prod.get('images') else prod.get('image', ''),
-                                'additionalInfo': prod.get('product_information', None)
-                            }
-                            # Ensure all required fields are strings
-                            for k in ['link', 'price', 'currency', 'productName', 'imageUrl']:
-                                if result[k] is None:
-                                    result[k] = ''
-                            results.append(result)
-                        if results:
-                            return results
-                except Exception as e:
-                    logger.error(f"ScraperAPI structured endpoint failed: {e}")
-            # Fallback to original HTML scraping logic
+            # Fetch raw bytes unless the hedged path already did: lxml parses
+            # them directly, saving a decode pass over ~500 KB of HTML.
             search_url = self.get_search_url(country, query)
-            logger.info(f"[Fallback] Searching Amazon {country}: {search_url}")
-            html_content = await self.fetch_html(search_url)
-            if not html_content:
+            if html_bytes is None:
+                logger.info(f"[Fallback] Searching Amazon {country}: {search_url}")
+                html_bytes = await self.fetch_bytes(search_url)
+            if not html_bytes:
                 logger.error(f"Failed to fetch Amazon search results for {query} in {country}")
                 return []
-            
-            # Parse HTML
-            soup = self.parse_html(html_content)
-            
-            # Find all product items
-            # Note: Amazon's HTML structure frequently changes, so we need to adapt
-            products = soup.select("div.s-result-item[data-component-type='s-search-result']")
+
+            # Parse only the product nodes from the HTML
+            soup = BeautifulSoup(html_bytes, "lxml", parse_only=_RESULT_STRAINER)
+            products = soup.find_all("div", attrs={"data-component-type": "s-search-result"})
+
+            # Note: Amazon's HTML structure frequently changes, so fall back to a
+            # full parse when the strainer finds nothing
             if not products:
-                products = soup.select("div.sg-col-inner")
-            
+                soup = BeautifulSoup(html_bytes, "lxml")
+                products = soup.select("div.s-result-item[data-component-type='s-search-result']")
+                if not products:
+                    products = soup.select("div.sg-col-inner")
+
             # Get currency symbol
-            currency = self._extract_currency(html_content, country)
-            
+            currency = self._extract_currency(html_bytes, country)
+
+            # Tokenize the query once instead of per product
+            query_tokens = self.prepare_query(query)
+
             # Process each product
             for product in products[:10]:  # Limit to 10 products to avoid overloading
                 try:
                     # Extract product link
-                    link_elem = product.select_one("a.a-link-normal.s-no-outline")
+                    # find with class filters avoids re-interpreting CSS selectors per product
+                    link_elem = product.find("a", class_="s-no-outline")
                     if not link_elem:
-                        link_elem = product.select_one("a.a-link-normal")
+                        link_elem = product.find("a", class_="a-link-normal")
                     
                     if not link_elem:
                         continue
@@ -137,33 +232,34 @@ class AmazonScraper(BaseScraper):
                         link = f"https://www.{domain}{link}"
                     
                     # Extract product name
-                    name_elem = product.select_one("span.a-size-medium.a-color-base.a-text-normal")
+                    name_elem = product.find("span", class_="a-size-medium")
                     if not name_elem:
-                        name_elem = product.select_one("span.a-size-base-plus.a-color-base.a-text-normal")
+                        name_elem = product.find("span", class_="a-size-base-plus")
                     
                     product_name = name_elem.text.strip() if name_elem else ""
                     
                     # Skip if product name doesn't match query
-                    if not product_name or not self.match_product(product_name, query):
+                    if not product_name or not self.match_tokens(product_name, query_tokens):
                         continue
                     
                     # Extract price
-                    price_elem = product.select_one("span.a-price > span.a-offscreen")
+                    price_span = product.find("span", class_="a-price")
+                    price_elem = price_span.find("span", class_="a-offscreen") if price_span else None
                     if not price_elem:
-                        price_elem = product.select_one("span.a-price-whole")
+                        price_elem = product.find("span", class_="a-price-whole")
                     
                     price_text = price_elem.text.strip() if price_elem else ""
                     price = self.clean_price(price_text)
                     
                     # Extract image URL
-                    img_elem = product.select_one("img.s-image")
+                    img_elem = product.find("img", class_="s-image")
                     img_url = img_elem.get("src") if img_elem else None
-                    
+
                     # Extract additional info
-                    rating_elem = product.select_one("span.a-icon-alt")
+                    rating_elem = product.find("span", class_="a-icon-alt")
                     rating = rating_elem.text.strip() if rating_elem else None
-                    
-                    reviews_elem = product.select_one("span.a-size-base.s-underline-text")
+
+                    reviews_elem = product.find("span", class_="s-underline-text")
                     reviews = reviews_elem.text.strip() if reviews_elem else None
                     
                     # Create result
@@ -189,71 +285,52 @@ class AmazonScraper(BaseScraper):
             # If results are empty or few, try using AI to parse the page
             if len(results) < 3 and self.ai_helper.api_key:
                 try:
-                    ai_result = await self._extract_with_ai(html_content, search_url, query)
+                    ai_result = await self._extract_with_ai(soup, search_url, query)
                     if ai_result:
                         results.extend(ai_result)
                 except Exception as e:
                     logger.error(f"Error using AI to extract Amazon products: {str(e)}")
-            
+
             return results
-                
+
         except Exception as e:
-            logger.error(f"Error searching Amazon: {str(e)}")
+            logger.error(f"Error scraping Amazon search page: {str(e)}")
             return results
     
-    def _extract_currency(self, html_content: str, country: str) -> str:
-        """Extract currency from HTML content."""
-        # Default currency mapping based on country
-        country_currency = {
-            "US": "USD",
-            "UK": "GBP",
-            "DE": "EUR",
-            "FR": "EUR",
-            "ES": "EUR",
-            "IT": "EUR",
-            "JP": "JPY",
-            "IN": "INR",
-            "CA": "CAD",
-            "AU": "AUD",
-        }
-        
+    def _extract_currency(self, html_bytes: bytes, country: str) -> str:
+        """Extract currency from raw HTML bytes."""
         # Try to extract from HTML
-        currency_match = re.search(r'ppu-currency">(\w+)<', html_content)
+        currency_match = _PPU_CURRENCY_RE.search(html_bytes)
         if currency_match:
-            return currency_match.group(1)
-        
+            return currency_match.group(1).decode("ascii", errors="ignore")
+
         # Use price symbol pattern
-        symbol_match = re.search(r'a-price-symbol">([^<]+)<', html_content)
+        symbol_match = _PRICE_SYMBOL_RE.search(html_bytes)
         if symbol_match:
-            symbol = symbol_match.group(1).strip()
-            symbol_to_currency = {
-                "$": "USD",
-                "£": "GBP",
-                "€": "EUR",
-                "¥": "JPY",
-                "₹": "INR",
-            }
-            return symbol_to_currency.get(symbol, country_currency.get(country.upper(), "USD"))
-        
+            symbol = symbol_match.group(1).decode("utf-8", errors="ignore").strip()
+            return _SYMBOL_TO_CURRENCY.get(symbol, _COUNTRY_CURRENCY.get(country.upper(), "USD"))
+
         # Fall back to country-based currency
-        return country_currency.get(country.upper(), "USD")
+        return _COUNTRY_CURRENCY.get(country.upper(), "USD")
     
-    async def _extract_with_ai(self, html_content: str, url: str, query: str) -> list:
+    async def _extract_with_ai(self, soup, url: str, query: str) -> list:
         if not self.ai_helper.api_key:
             return []
         try:
-            truncated_html = html_content[:15000] + "..." if len(html_content) > 15000 else html_content
+            # Send only the result container to Gemini, not the whole page of
+            # boilerplate; the strained soup already holds just the product nodes
+            container = soup.find("div", id="search") or soup
+            truncated_html = str(container)[:8000]
             prompt = f"""
             You are a web scraping assistant. Extract up to 5 product listings from this Amazon search results page.\nSearch URL: {url}\nSearch Query: {query}\nHTML Content (truncated):\n{truncated_html}\nFor each product found, return a JSON list of objects with: productName, price, currency, link, imageUrl, additionalInfo (should be a dictionary or null). Only include products that match the search query.
             """
             answer = await self.ai_helper._call_gemini(prompt)
             logger.debug(f"Gemini raw answer: {answer}")
-            import json, re
-            match = re.search(r'\[.*\]', answer, re.DOTALL)
+            match = _JSON_ARRAY_RE.search(answer)
             if match:
                 answer = match.group(0)
             try:
-                parsed_results = json.loads(answer)
+                parsed_results = orjson.loads(answer)
                 logger.debug(f"Gemini parsed_results: {parsed_results}")
                 results = []
                 if isinstance(parsed_results, list):
@@ -1,12 +1,52 @@
 from typing import List, Dict, Any
 import urllib.parse
-import re
+import orjson
+from lxml import etree
+import lxml.html
+from selectolax.lexbor import LexborHTMLParser
 from src.scraper.base_scraper import BaseScraper
 from src.utils.logger import get_logger
-from src.utils.ai_helper import AIHelper
+from src.utils.ai_helper import AIHelper, compact_html
 
 logger = get_logger(__name__)
 
+# XPath expressions for the lxml fallback, compiled once at import so the
+# CSS-to-XPath translation cost isn't paid per call
+_XP_PRODUCTS = etree.XPath(".//div[contains(@class,'_1AtVbE')]")
+_XP_LINK = etree.XPath(".//a[contains(@class,'_1fQZEK') or contains(@class,'_2rpwqI') or contains(@class,'s1Q9rs')]")
+_XP_NAME = etree.XPath(".//div[contains(@class,'_4rR01T')]|.//a[contains(@class,'s1Q9rs')]|.//div[contains(@class,'_2WkVRV')]")
+_XP_PRICE = etree.XPath(".//div[contains(@class,'_30jeq3')]")
+_XP_IMG = etree.XPath(".//img[contains(@class,'_396cs4') or contains(@class,'_2r_T1I')]")
+_XP_RATING = etree.XPath(".//div[contains(@class,'_3LWZlK')]")
+_XP_REVIEWS = etree.XPath(".//span[contains(@class,'_2_R_DZ')]")
+
+# Fields that must always be present as strings in AI-extracted results
+_REQUIRED_FIELDS = ("link", "price", "currency", "productName", "imageUrl")
+
+# Result skeleton shared by both parse paths; copying a prebuilt dict is
+# cheaper than constructing the same literal on every product
+_RESULT_TEMPLATE = {
+    "link": None,
+    "price": "0",
+    "currency": "INR",
+    "productName": "",
+    "source": "Flipkart",
+    "imageUrl": None,
+    "additionalInfo": None,
+}
+
+# Static halves of the Gemini prompt, built once at import; per call only the
+# url, query and truncated HTML are joined in between
+_PROMPT_PRE = (
+    "You are a web scraping assistant. Extract up to 5 product listings from "
+    "this Flipkart search results page.\nSearch URL: "
+)
+_PROMPT_POST = (
+    "\nFor each product found, return a JSON list of objects with: productName, "
+    "price, currency, link, imageUrl, additionalInfo (should be a dictionary or "
+    "null). Only include products that match the search query."
+)
+
 class FlipkartScraper(BaseScraper):
     """Scraper for Flipkart website."""
     
@@ -44,77 +84,29 @@ class FlipkartScraper(BaseScraper):
             search_url = self.get_search_url(country, query)
             logger.info(f"Searching Flipkart: {search_url}")
             
-            # Fetch search results page
-            html_content = await self.fetch_html(search_url)
-            if not html_content:
+            # Fetch the search results page as raw bytes: lexbor and lxml both
+            # read the document's own encoding, so the str decode pass is skipped
+            html_bytes = await self.fetch_bytes(search_url)
+            if not html_bytes:
                 logger.error(f"Failed to fetch Flipkart search results for {query}")
                 return []
-            
-            # Parse HTML
-            soup = self.parse_html(html_content)
-            
-            # Find all product items
-            products = soup.select("div._1AtVbE")
-            
-            # Process each product
-            for product in products[:10]:  # Limit to 10 products
-                try:
-                    # Extract product link
-                    link_elem = product.select_one("a._1fQZEK, a._2rpwqI, a.s1Q9rs")
-                    if not link_elem:
-                        continue
-                    
-                    link = link_elem.get("href")
-                    if link and link.startswith("/"):
-                        link = f"https://www.flipkart.com{link}"
-                    
-                    # Extract product name
-                    name_elem = product.select_one("div._4rR01T, a.s1Q9rs, div._2WkVRV")
-                    product_name = name_elem.text.strip() if name_elem else ""
-                    
-                    # Skip if product name doesn't match query
-                    if not product_name or not self.match_product(product_name, query):
-                        continue
-                    
-                    # Extract price
-                    price_elem = product.select_one("div._30jeq3._1_WHN1, div._30jeq3")
-                    price_text = price_elem.text.strip() if price_elem else ""
-                    price = self.clean_price(price_text)
-                    
-                    # Extract image URL
-                    img_elem = product.select_one("img._396cs4, img._2r_T1I")
-                    img_url = img_elem.get("src") if img_elem else None
-                    
-                    # Extract additional info
-                    rating_elem = product.select_one("div._3LWZlK")
-                    rating = rating_elem.text.strip() if rating_elem else None
-                    
-                    reviews_elem = product.select_one("span._2_R_DZ")
-                    reviews = reviews_elem.text.strip() if reviews_elem else None
-                    
-                    # Create result
-                    result = {
-                        "link": link,
-                        "price": price,
-                        "currency": "INR",  # Flipkart uses INR
-                        "productName": product_name,
-                        "source": "Flipkart",
-                        "imageUrl": img_url,
-                        "additionalInfo": {
-                            "rating": rating,
-                            "reviews": reviews
-                        }
-                    }
-                    
-                    results.append(result)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing Flipkart product: {str(e)}")
-                    continue
-            
+
+            # Parse with selectolax (lexbor): roughly an order of magnitude
+            # faster than BeautifulSoup on both parse and CSS lookups
+            tree = LexborHTMLParser(html_bytes)
+            products = tree.css("div._1AtVbE")
+
+            if not products:
+                # Fall back to lxml in case lexbor chokes on the markup
+                results = self._parse_with_lxml(html_bytes, query)
+            else:
+                results = self._parse_products(products, query)
+
             # If results are empty or few, try using AI to parse the page
             if len(results) < 3 and self.ai_helper.api_key:
                 try:
+                    # Only the AI prompt path needs a str
+                    html_content = html_bytes.decode("utf-8", errors="replace")
                     ai_result = await self._extract_with_ai(html_content, search_url, query)
                     if ai_result:
                         results.extend(ai_result)
@@ -127,22 +119,142 @@ class FlipkartScraper(BaseScraper):
             logger.error(f"Error searching Flipkart: {str(e)}")
             return results
             
+    def _parse_products(self, products, query: str) -> List[Dict[str, Any]]:
+        """Extract product results from selectolax nodes."""
+        results = []
+        query_tokens = self.prepare_query(query)
+        for product in products[:10]:  # Limit to 10 products
+            try:
+                # Extract and match the product name first: most items in a
+                # broad result set fail the match, so don't pay for the other
+                # selectors on rejected products
+                name_elem = (product.css_first("div._4rR01T")
+                             or product.css_first("a.s1Q9rs")
+                             or product.css_first("div._2WkVRV"))
+                product_name = name_elem.text(strip=True) if name_elem else ""
+
+                # Skip if product name doesn't match query
+                if not product_name or not self.match_tokens(product_name, query_tokens):
+                    continue
+
+                # Extract product link (lexbor can't take selector lists in one
+                # call, so short-circuit the alternatives)
+                link_elem = (product.css_first("a._1fQZEK")
+                             or product.css_first("a._2rpwqI")
+                             or product.css_first("a.s1Q9rs"))
+                if not link_elem:
+                    continue
+
+                link = link_elem.attributes.get("href")
+                if link and link.startswith("/"):
+                    link = f"https://www.flipkart.com{link}"
+
+                # Extract price
+                price_elem = product.css_first("div._30jeq3")
+                price_text = price_elem.text(strip=True) if price_elem else ""
+                price = self.clean_price(price_text)
+
+                # Extract image URL
+                img_elem = product.css_first("img._396cs4") or product.css_first("img._2r_T1I")
+                img_url = img_elem.attributes.get("src") if img_elem else None
+
+                # Extract additional info
+                rating_elem = product.css_first("div._3LWZlK")
+                rating = rating_elem.text(strip=True) if rating_elem else None
+
+                reviews_elem = product.css_first("span._2_R_DZ")
+                reviews = reviews_elem.text(strip=True) if reviews_elem else None
+
+                # Create result
+                result = _RESULT_TEMPLATE.copy()
+                result["link"] = link
+                result["price"] = price
+                result["productName"] = product_name
+                result["imageUrl"] = img_url
+                result["additionalInfo"] = {
+                    "rating": rating,
+                    "reviews": reviews
+                }
+
+                results.append(result)
+
+            except Exception as e:
+                logger.error(f"Error processing Flipkart product: {str(e)}")
+                continue
+
+        return results
+
+    def _parse_with_lxml(self, html_content, query: str) -> List[Dict[str, Any]]:
+        """lxml fallback for markup the primary parser can't handle.
+
+        Accepts either str or raw bytes.
+        """
+        results = []
+        query_tokens = self.prepare_query(query)
+        root = lxml.html.fromstring(html_content)
+        for product in _XP_PRODUCTS(root)[:10]:
+            try:
+                # Name first, for the same reason as in _parse_products
+                name_elems = _XP_NAME(product)
+                product_name = name_elems[0].text_content().strip() if name_elems else ""
+                if not product_name or not self.match_tokens(product_name, query_tokens):
+                    continue
+
+                link_elems = _XP_LINK(product)
+                if not link_elems:
+                    continue
+
+                link = link_elems[0].get("href")
+                if link and link.startswith("/"):
+                    link = f"https://www.flipkart.com{link}"
+
+                price_elems = _XP_PRICE(product)
+                price_text = price_elems[0].text_content().strip() if price_elems else ""
+                price = self.clean_price(price_text)
+
+                img_elems = _XP_IMG(product)
+                img_url = img_elems[0].get("src") if img_elems else None
+
+                rating_elems = _XP_RATING(product)
+                rating = rating_elems[0].text_content().strip() if rating_elems else None
+
+                reviews_elems = _XP_REVIEWS(product)
+                reviews = reviews_elems[0].text_content().strip() if reviews_elems else None
+
+                result = _RESULT_TEMPLATE.copy()
+                result["link"] = link
+                result["price"] = price
+                result["productName"] = product_name
+                result["imageUrl"] = img_url
+                result["additionalInfo"] = {
+                    "rating": rating,
+                    "reviews": reviews
+                }
+                results.append(result)
+            except Exception as e:
+                logger.error(f"Error processing Flipkart product: {str(e)}")
+                continue
+
+        return results
+
     async def _extract_with_ai(self, html_content: str, url: str, query: str) -> list:
         if not self.ai_helper.api_key:
             return []
         try:
-            truncated_html = html_content[:15000] + "..." if len(html_content) > 15000 else html_content
-            prompt = f"""
-            You are a web scraping assistant. Extract up to 5 product listings from this Flipkart search results page.\nSearch URL: {url}\nSearch Query: {query}\nHTML Content (truncated):\n{truncated_html}\nFor each product found, return a JSON list of objects with: productName, price, currency, link, imageUrl, additionalInfo (should be a dictionary or null). Only include products that match the search query.
-            """
+            truncated_html = compact_html(html_content, 15000)
+            prompt = "".join((
+                _PROMPT_PRE, url,
+                "\nSearch Query: ", query,
+                "\nHTML Content (truncated):\n", truncated_html,
+                _PROMPT_POST,
+            ))
             answer = await self.ai_helper._call_gemini(prompt)
             logger.debug(f"Gemini raw answer: {answer}")
-            import json, re
-            match = re.search(r'\[.*\]', answer, re.DOTALL)
-            if match:
-                answer = match.group(0)
+            blob = self.ai_helper._extract_json_blob(answer)
+            if blob:
+                answer = blob
             try:
-                parsed_results = json.loads(answer)
+                parsed_results = orjson.loads(answer)
                 logger.debug(f"Gemini parsed_results: {parsed_results}")
                 results = []
                 if isinstance(parsed_results, list):
@@ -158,11 +270,9 @@ class FlipkartScraper(BaseScraper):
                                 else:
                                     item["additionalInfo"] = {"info": str(item["additionalInfo"])}
                             # Ensure required fields are strings
-                            for field in ["link", "price", "currency", "productName", "imageUrl"]:
-                                if field in item and item[field] is None:
-                                    item[field] = ""
-                                elif field not in item:
-                                    item[field] = ""
+                            for field in _REQUIRED_FIELDS:
+                                value = item.get(field)
+                                item[field] = "" if value is None else value
                             results.append(item)
                 logger.debug(f"Final results to return: {results}")
                 return results
@@ -1,14 +1,91 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
+import os
 import re
 import urllib.parse
+from functools import lru_cache
 import httpx
+import orjson
 from src.scraper.base_scraper import BaseScraper
 from src.utils.logger import get_logger
-from src.utils.ai_helper import AIHelper
+from src.utils.ai_helper import AIHelper, compact_html
 from bs4 import BeautifulSoup
 
 logger = get_logger(__name__)
 
+# Remembers which links already passed (or failed) HEAD validation so repeated
+# searches don't re-check the same URLs
+_LINK_CACHE: Dict[str, bool] = {}
+
+# AI-discovered site lists are persisted here so later process starts skip the
+# Gemini lookup entirely; the cache/ directory is created on ai_helper import
+_SITES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "cache", "ecommerce_sites.json"
+)
+
+def _load_persisted_sites() -> Dict[str, List[str]]:
+    """Load AI-discovered country site lists from disk."""
+    try:
+        if os.path.exists(_SITES_FILE):
+            with open(_SITES_FILE, "rb") as f:
+                return orjson.loads(f.read())
+    except Exception as e:
+        logger.error(f"Error loading persisted site lists: {e}")
+    return {}
+
+def _persist_sites(sites: Dict[str, List[str]]):
+    """Write AI-discovered country site lists to disk."""
+    try:
+        with open(_SITES_FILE, "wb") as f:
+            f.write(orjson.dumps(sites))
+    except Exception as e:
+        logger.error(f"Error persisting site lists: {e}")
+
+# Known search URL patterns by site family; dict dispatch instead of the
+# old if/elif substring chain
+_URL_BUILDERS = {
+    "amazon": lambda w, q: f"https://www.{w}/s?k={q}",
+    "ebay": lambda w, q: f"https://www.{w}/sch/i.html?_nkw={q}",
+    "walmart": lambda w, q: f"https://www.{w}/search/?query={q}",
+    "flipkart": lambda w, q: f"https://www.{w}/search?q={q}",
+}
+
+@lru_cache(maxsize=256)
+def _url_builder_for(website: str):
+    """Resolve which family's URL builder a website uses, cached per domain."""
+    family = next((k for k in _URL_BUILDERS if k in website), None)
+    return _URL_BUILDERS.get(family)
+
+# Fields that must always be present as strings in AI-extracted results
+_REQUIRED_FIELDS = ("link", "price", "currency", "productName", "imageUrl")
+
+# Result skeleton for the BeautifulSoup fallback; copying a prebuilt dict is
+# cheaper than constructing the same literal on every product
+_RESULT_TEMPLATE = {
+    "link": "",
+    "price": "",
+    "currency": "",
+    "productName": "",
+    "source": "",
+    "imageUrl": "",
+    "additionalInfo": None,
+}
+
+# Static pieces of the Gemini prompt, built once at import; per call only the
+# website, url, query and truncated HTML are joined in between
+_PROMPT_PRE = "You are a web scraping assistant. Extract up to 5 product listings ONLY from the website "
+_PROMPT_MID = ". Do NOT include products from any other site.\nWebsite: "
+_PROMPT_RULES = (
+    "\nFor each product, return a JSON list of objects with: productName, price, "
+    "currency, link, imageUrl, additionalInfo (should be a dictionary or null)."
+    "\nOnly use product links that are present in the provided HTML. Do not make "
+    "up or guess links. If you cannot find a link, skip the product. If a field "
+    "is missing, set it to an empty string. Always include the product link and "
+    "price if possible. Only include products that match the search query and "
+    "are actually from "
+)
+
 class GenericAIScraper(BaseScraper):
     """
     A generic scraper that uses AI to extract product information from any website.
@@ -73,17 +150,24 @@ class GenericAIScraper(BaseScraper):
         "duckduckgo": "https://duckduckgo.com/?q={query}+{product}+{country}+buy+online",
     }
     
+    # Compiled at class-definition time so the per-result link checks don't
+    # pay the re-cache lookup on every call
     PRODUCT_URL_PATTERNS = {
-        "amazon.in": r"/dp/|/gp/product/",
-        "flipkart.com": r"/p/|/product/|/search\?q=",
-        "myntra.com": r"/buy|/\d{6,}/buy",
-        "snapdeal.com": r"/product/|/search\?",
+        "amazon.in": re.compile(r"/dp/|/gp/product/"),
+        "flipkart.com": re.compile(r"/p/|/product/|/search\?q="),
+        "myntra.com": re.compile(r"/buy|/\d{6,}/buy"),
+        "snapdeal.com": re.compile(r"/product/|/search\?"),
     }
     
+    # Serializes the Gemini site-list lookup per country so concurrent
+    # searches for the same new country don't fire N identical calls
+    _country_locks: Dict[str, asyncio.Lock] = {}
+    _country_lock_guard = asyncio.Lock()
+
     def __init__(self):
         super().__init__()
         self.ai_helper = AIHelper()
-    
+
     def get_search_url(self, country: str, query: str) -> str:
         """Get a generic search URL based on the country and query."""
         # This is a placeholder as we'll be using multiple URLs
@@ -105,15 +189,24 @@ class GenericAIScraper(BaseScraper):
         # For countries we don't have predefined sites for, try to get suggestions from AI
         if self.ai_helper.api_key:
             try:
-                # Use Gemini
-                import asyncio
-                answer = await self.ai_helper._call_gemini(f"What are the 5 most popular e-commerce websites in {country}? Please list only the domain names (e.g., amazon.com), one per line without any explanation or numbering.")
-                sites = [line.strip() for line in answer.split("\n") if line.strip()]
-                
-                if sites:
-                    # Cache these for future use
-                    self.ECOMMERCE_SITES[country_code] = sites
-                    return sites
+                async with self._country_lock_guard:
+                    lock = self._country_locks.setdefault(country_code, asyncio.Lock())
+                async with lock:
+                    # Another task may have filled the cache while we waited
+                    if country_code in self.ECOMMERCE_SITES:
+                        return self.ECOMMERCE_SITES[country_code]
+
+                    # Use Gemini
+                    answer = await self.ai_helper._call_gemini(f"What are the 5 most popular e-commerce websites in {country}? Please list only the domain names (e.g., amazon.com), one per line without any explanation or numbering.")
+                    sites = [line.strip() for line in answer.split("\n") if line.strip()]
+
+                    if sites:
+                        # Cache these for future use, surviving restarts
+                        self.ECOMMERCE_SITES[country_code] = sites
+                        discovered = _load_persisted_sites()
+                        discovered[country_code] = sites
+                        _persist_sites(discovered)
+                        return sites
             except Exception as e:
                 logger.error(f"Error getting websites for country {country}: {str(e)}")
         
@@ -123,99 +216,137 @@ class GenericAIScraper(BaseScraper):
     async def search(self, country: str, query: str) -> List[Dict[str, Any]]:
         """Search for products across multiple websites based on the country."""
         results = []
-        
+
+        # Without an API key _extract_with_ai can only return [], so don't
+        # bother fetching the search pages at all
+        if not self.ai_helper.api_key:
+            return []
+
         try:
             # Get relevant websites for the country
-            websites = await self.get_websites_for_country(country)
-            
-            # Search on each website
-            search_tasks = []
-            for website in websites[:5]:  # Expand to 5 sites
-                search_tasks.append(self._search_website(website, country, query))
-            
-            # Run all searches concurrently
-            import asyncio
-            website_results = await asyncio.gather(*search_tasks, return_exceptions=True)
-            
+            websites = (await self.get_websites_for_country(country))[:5]  # Expand to 5 sites
+            # Quote the query once rather than per site
+            encoded_query = urllib.parse.quote(query)
+            search_urls = [self._build_search_url(website, encoded_query) for website in websites]
+            for website, search_url in zip(websites, search_urls):
+                logger.info(f"Searching {website} for {query} in {country}: {search_url}")
+
+            # Phase 1: fetch all search pages concurrently
+            html_pages = await asyncio.gather(
+                *(self.fetch_html(url) for url in search_urls),
+                return_exceptions=True
+            )
+
+            # Phase 2: run all AI extractions concurrently, so Gemini latency
+            # is multiplexed instead of stacked behind each site's fetch
+            extract_tasks = []
+            for website, search_url, html_content in zip(websites, search_urls, html_pages):
+                if isinstance(html_content, Exception):
+                    logger.error(f"Error fetching {website}: {str(html_content)}")
+                    continue
+                if not html_content:
+                    logger.error(f"Failed to fetch search results from {website}")
+                    continue
+                extract_tasks.append(self._extract_with_ai(html_content, search_url, query, website))
+            website_results = await asyncio.gather(*extract_tasks, return_exceptions=True)
+
             # Process results
             for website_result in website_results:
                 if isinstance(website_result, Exception):
                     logger.error(f"Error in website search: {str(website_result)}")
                     continue
-                    
+
                 if isinstance(website_result, list):
                     results.extend(website_result)
-            
+
             return results
-            
+
         except Exception as e:
             logger.error(f"Error in generic AI search: {str(e)}")
             return []
+
+    def _build_search_url(self, website: str, encoded_query: str) -> str:
+        """Build the search URL for a specific website from an already-quoted query."""
+        # For some common site families, use known search URL patterns
+        builder = _url_builder_for(website)
+        if builder is not None:
+            return builder(website, encoded_query)
+        return f"https://www.{website}/search?q={encoded_query}"
     
-    async def _search_website(self, website: str, country: str, query: str) -> List[Dict[str, Any]]:
-        """Search for products on a specific website."""
-        try:
-            # Create search URL for the website
-            search_url = f"https://www.{website}/search?q={urllib.parse.quote(query)}"
-            
-            # For some common sites, use known search URL patterns
-            if "amazon" in website:
-                search_url = f"https://www.{website}/s?k={urllib.parse.quote(query)}"
-            elif "ebay" in website:
-                search_url = f"https://www.{website}/sch/i.html?_nkw={urllib.parse.quote(query)}"
-            elif "walmart" in website:
-                search_url = f"https://www.{website}/search/?query={urllib.parse.quote(query)}"
-            elif "flipkart" in website:
-                search_url = f"https://www.{website}/search?q={urllib.parse.quote(query)}"
-            
-            logger.info(f"Searching {website} for {query} in {country}: {search_url}")
-            
-            # Fetch the search results page
-            html_content = await self.fetch_html(search_url)
-            if not html_content:
-                logger.error(f"Failed to fetch search results from {website}")
-                return []
-            
-            # Extract product information using AI
-            results = await self._extract_with_ai(html_content, search_url, query, website)
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error searching {website}: {str(e)}")
-            return []
-    
+    def _validate_link(self, link: str, domain: str, pattern, website: str) -> Optional[str]:
+        """Normalize a product link and run the domain/pattern checks in one pass.
+
+        Returns the normalized URL, or None if the link is missing, off-domain
+        or doesn't match the site's product URL pattern.
+        """
+        if not link:
+            return None
+        if not link.startswith(("http://", "https://")):
+            link = f"https://www.{website}{link if link.startswith('/') else '/' + link}"
+        if domain not in link.lower():
+            return None
+        if pattern and not pattern.search(link):
+            return None
+        return link
+
+    async def _validate_links(self, links: List[str]) -> Dict[str, bool]:
+        """HEAD-check candidate links concurrently and cache the verdicts.
+
+        All uncached links are validated in one batch over a single client, so
+        the cost is one round trip instead of one per link.
+        """
+        if len(_LINK_CACHE) > 1024:
+            _LINK_CACHE.clear()
+        to_check = [link for link in links if link not in _LINK_CACHE]
+        if to_check:
+            limits = httpx.Limits(max_connections=20)
+            async with httpx.AsyncClient(timeout=5, limits=limits) as client:
+                responses = await asyncio.gather(
+                    *(client.head(link, follow_redirects=True) for link in to_check),
+                    return_exceptions=True
+                )
+            for link, resp in zip(to_check, responses):
+                if isinstance(resp, Exception):
+                    logger.warning(f"Skipping product with unreachable link: {link} ({resp})")
+                    _LINK_CACHE[link] = False
+                elif resp.status_code != 200:
+                    logger.warning(f"Skipping product with non-200 link: {link} (status {resp.status_code})")
+                    _LINK_CACHE[link] = False
+                else:
+                    _LINK_CACHE[link] = True
+        return {link: _LINK_CACHE[link] for link in links}
+
     async def _extract_with_ai(self, html_content: str, url: str, query: str, website: str) -> list:
         if not self.ai_helper.api_key or not html_content:
             return []
         try:
-            truncated_html = html_content[:15000] + "..." if len(html_content) > 15000 else html_content
+            truncated_html = compact_html(html_content, 15000)
             domain = website.lower().replace('www.', '')
             pattern = self.PRODUCT_URL_PATTERNS.get(domain, None)
-            pattern_note = f" For {domain}, only extract links matching the pattern: {pattern}" if pattern else ""
-            prompt = f"""
-            You are a web scraping assistant. Extract up to 5 product listings ONLY from the website {website}. Do NOT include products from any other site.\nWebsite: {website}\nSearch URL: {url}\nSearch Query: {query}\nHTML Content (truncated):\n{truncated_html}\nFor each product, return a JSON list of objects with: productName, price, currency, link, imageUrl, additionalInfo (should be a dictionary or null).\nOnly use product links that are present in the provided HTML. Do not make up or guess links. If you cannot find a link, skip the product. If a field is missing, set it to an empty string. Always include the product link and price if possible. Only include products that match the search query and are actually from {website}.{pattern_note}
-            """
+            pattern_note = f" For {domain}, only extract links matching the pattern: {pattern.pattern}" if pattern else ""
+            prompt = "".join((
+                _PROMPT_PRE, website, _PROMPT_MID, website,
+                "\nSearch URL: ", url,
+                "\nSearch Query: ", query,
+                "\nHTML Content (truncated):\n", truncated_html,
+                _PROMPT_RULES, website, ".", pattern_note,
+            ))
             answer = await self.ai_helper._call_gemini(prompt)
             logger.debug(f"Gemini raw answer: {answer}")
-            import json, re
-            match = re.search(r'\[.*\]', answer, re.DOTALL)
-            if match:
-                answer = match.group(0)
+            blob = self.ai_helper._extract_json_blob(answer)
+            if blob:
+                answer = blob
             try:
-                parsed_results = json.loads(answer)
+                parsed_results = orjson.loads(answer)
                 logger.debug(f"Gemini parsed_results: {parsed_results}")
                 processed_results = []
+                candidates = []
                 if isinstance(parsed_results, list):
                     for item in parsed_results:
                         if not isinstance(item, dict):
                             continue
                         if "productName" not in item or not item["productName"]:
                             continue
-                        if "link" in item and item["link"] and not item["link"].startswith(("http://", "https://")):
-                            if item["link"].startswith("/"):
-                                item["link"] = f"https://www.{website}{item['link']}"
-                            else:
-                                item["link"] = f"https://www.{website}/{item['link']}"
                         if "source" not in item:
                             item["source"] = website
                         if "price" in item and item["price"]:
@@ -227,32 +358,27 @@ class GenericAIScraper(BaseScraper):
                             else:
                                 item["additionalInfo"] = {"info": str(item["additionalInfo"])}
                         # Ensure required fields are strings
-                        for field in ["link", "price", "currency", "productName", "imageUrl"]:
-                            if field in item and item[field] is None:
-                                item[field] = ""
-                            elif field not in item:
-                                item[field] = ""
-                        # Skip if link or price is empty
-                        if not item["link"] or not item["price"]:
-                            logger.warning(f"Skipping product with missing link or price: {item}")
-                            continue
-                        # Only accept products whose link contains the correct domain
-                        if domain not in item["link"].lower():
-                            logger.warning(f"Skipping product with wrong domain: {item}")
+                        for field in _REQUIRED_FIELDS:
+                            value = item.get(field)
+                            item[field] = "" if value is None else value
+                        # Skip if the price is empty or the link fails validation
+                        if not item["price"]:
+                            logger.warning(f"Skipping product with missing price: {item}")
                             continue
-                        # If pattern is set, only accept links matching the pattern
-                        if pattern and not re.search(pattern, item["link"]):
-                            logger.warning(f"Skipping product with link not matching pattern: {item}")
+                        link = self._validate_link(item["link"], domain, pattern, website)
+                        if not link:
+                            logger.warning(f"Skipping product with missing or invalid link: {item}")
                             continue
-                        # Validate link with HEAD request
-                        try:
-                            async with httpx.AsyncClient(timeout=5) as client:
-                                resp = await client.head(item["link"], follow_redirects=True)
-                                if resp.status_code != 200:
-                                    logger.warning(f"Skipping product with non-200 link: {item['link']} (status {resp.status_code})")
-                                    continue
-                        except Exception as e:
-                            logger.warning(f"Skipping product with unreachable link: {item['link']} ({e})")
+                        item["link"] = link
+                        candidates.append(item)
+                        if len(candidates) >= 10:
+                            break
+                # Validate all candidate links in one concurrent batch instead
+                # of one HEAD round trip at a time
+                if candidates:
+                    valid = await self._validate_links([item["link"] for item in candidates])
+                    for item in candidates:
+                        if not valid.get(item["link"]):
                             continue
                         processed_results.append(item)
                         if len(processed_results) >= 5:
@@ -263,6 +389,7 @@ class GenericAIScraper(BaseScraper):
                     soup = BeautifulSoup(html_content, "html.parser")
                     links = soup.find_all("a", href=True)
                     seen = set()
+                    fallback_candidates = []
                     for a in links:
                         href = a["href"]
                         if domain not in href:
@@ -271,32 +398,28 @@ class GenericAIScraper(BaseScraper):
                             continue
                         seen.add(href)
                         # Only accept links matching the product pattern
-                        if pattern and not re.search(pattern, href):
+                        if pattern and not pattern.search(href):
                             continue
                         # Try to get product name from link text or title
                         name = a.get_text(strip=True) or a.get("title", "")
                         if not name:
                             continue
-                        # Validate link
                         link = href if href.startswith("http") else f"https://{domain}{href if href.startswith('/') else '/' + href}"
-                        try:
-                            async with httpx.AsyncClient(timeout=5) as client:
-                                resp = await client.head(link, follow_redirects=True)
-                                if resp.status_code != 200:
-                                    continue
-                        except Exception:
-                            continue
-                        processed_results.append({
-                            "link": link,
-                            "price": "",
-                            "currency": "",
-                            "productName": name,
-                            "source": website,
-                            "imageUrl": "",
-                            "additionalInfo": None
-                        })
-                        if len(processed_results) >= 5:
+                        fallback_candidates.append((link, name))
+                        if len(fallback_candidates) >= 10:
                             break
+                    if fallback_candidates:
+                        valid = await self._validate_links([link for link, _ in fallback_candidates])
+                        for link, name in fallback_candidates:
+                            if not valid.get(link):
+                                continue
+                            result = _RESULT_TEMPLATE.copy()
+                            result["link"] = link
+                            result["productName"] = name
+                            result["source"] = website
+                            processed_results.append(result)
+                            if len(processed_results) >= 5:
+                                break
                 logger.debug(f"Final results to return: {processed_results}")
                 return processed_results
             except Exception as e:
@@ -304,4 +427,8 @@ class GenericAIScraper(BaseScraper):
                 return []
         except Exception as e:
             logger.error(f"Error extracting products with AI from {website}: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+
+# Merge site lists discovered in earlier runs; predefined lists take precedence
+for _country, _sites in _load_persisted_sites().items():
+    GenericAIScraper.ECOMMERCE_SITES.setdefault(_country, _sites) 
\ No newline at end of file
@@ -1,6 +1,11 @@
+import hashlib
 import os
+import re
+import time
 import httpx
-from typing import List, Dict, Any
+import orjson
+from selectolax.lexbor import LexborHTMLParser
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from src.utils.logger import get_logger
 
@@ -9,17 +14,100 @@ load_dotenv()
 
 logger = get_logger(__name__)
 
+# Create cache directory for Gemini responses if it doesn't exist
+_cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache")
+if not os.path.exists(_cache_dir):
+    os.makedirs(_cache_dir)
+
+# Cached responses older than this are refetched
+_CACHE_TTL = 86400
+
+# Within-process cache so repeated prompts don't even touch the disk
+_memory_cache: Dict[str, str] = {}
+_MEMORY_CACHE_MAX = 1024
+
+def _cache_get(key: str) -> str:
+    """Look up a cached Gemini response, first in memory, then on disk."""
+    if key in _memory_cache:
+        return _memory_cache[key]
+    path = os.path.join(_cache_dir, f"{key}.txt")
+    try:
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < _CACHE_TTL:
+            with open(path, encoding="utf-8") as f:
+                answer = f.read()
+            _memory_cache[key] = answer
+            return answer
+    except Exception as e:
+        logger.error(f"Error reading Gemini cache entry {key}: {e}")
+    return None
+
+def _cache_put(key: str, answer: str):
+    """Store a Gemini response in the in-memory and on-disk caches."""
+    if len(_memory_cache) >= _MEMORY_CACHE_MAX:
+        _memory_cache.clear()
+    _memory_cache[key] = answer
+    try:
+        with open(os.path.join(_cache_dir, f"{key}.txt"), "w", encoding="utf-8") as f:
+            f.write(answer)
+    except Exception as e:
+        logger.error(f"Error writing Gemini cache entry {key}: {e}")
+
+# Collapses runs of whitespace left behind after stripping tags
+_WS_RE = re.compile(r'\s+')
+
+def compact_html(html: str, limit: int) -> str:
+    """Strip non-content markup from HTML and truncate it to `limit` chars.
+
+    Script, style and similar blocks are useless to the model but usually
+    dominate the head of the page, so dropping them before the cut keeps far
+    more real product markup inside the prompt budget.
+    """
+    if not html:
+        return html
+    try:
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(["script", "style", "noscript", "svg", "iframe"])
+        body = tree.body
+        compact = body.html if body is not None else html
+    except Exception as e:
+        logger.error(f"Error compacting HTML: {e}")
+        compact = html
+    compact = _WS_RE.sub(' ', compact)
+    return compact[:limit] + "..." if len(compact) > limit else compact
+
 class AIHelper:
+    # Process-wide singleton: every scraper constructs an AIHelper, and they
+    # all share the same key, endpoint and HTTP client anyway
+    _instance: Optional["AIHelper"] = None
+
+    # Shared across instances so every Gemini call reuses the same TLS
+    # connection instead of paying a fresh handshake per call
+    _client: Optional[httpx.AsyncClient] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
     def __init__(self):
+        if getattr(self, "_initialized", False):
+            return
         self.api_key = os.getenv("GOOGLE_API_KEY")
         self.api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
         if not self.api_key:
             logger.warning("Google API key not found, AI functionality will be limited")
+        self._initialized = True
 
     async def _call_gemini(self, prompt: str) -> str:
         if not self.api_key:
             logger.warning("No Google API key set.")
             return ""
+        # Identical prompts recur across repeated searches; serve those from
+        # the cache instead of paying the API round trip again
+        cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            return cached
         headers = {"Content-Type": "application/json"}
         params = {"key": self.api_key}
         data = {
@@ -28,16 +116,68 @@ class AIHelper:
             ]
         }
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(self.api_url, headers=headers, params=params, json=data, timeout=30)
-                resp.raise_for_status()
-                result = resp.json()
-                # Gemini returns candidates[0].content.parts[0].text
-                return result["candidates"][0]["content"]["parts"][0]["text"]
+            client = self._get_client()
+            resp = await client.post(self.api_url, headers=headers, params=params, json=data, timeout=30)
+            resp.raise_for_status()
+            result = resp.json()
+            # Gemini returns candidates[0].content.parts[0].text
+            answer = result["candidates"][0]["content"]["parts"][0]["text"]
+            _cache_put(cache_key, answer)
+            return answer
         except Exception as e:
             logger.error(f"Gemini API error: {e}")
             return ""
 
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """Get the shared httpx client, creating it on first use."""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                timeout=30,
+                limits=httpx.Limits(max_keepalive_connections=10),
+            )
+        return cls._client
+
+    @staticmethod
+    def _extract_json_blob(s: str, open_c: str = '[', close_c: str = ']') -> Optional[str]:
+        """Extract the first balanced JSON array/object from a string.
+
+        Single forward pass with a depth counter; avoids the greedy DOTALL
+        regex scan over multi-KB Gemini answers. Brackets inside JSON string
+        literals (including escaped quotes) are ignored.
+        """
+        start = s.find(open_c)
+        if start < 0:
+            return None
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(s)):
+            c = s[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif c == '\\':
+                    escaped = True
+                elif c == '"':
+                    in_string = False
+            elif c == '"':
+                in_string = True
+            elif c == open_c:
+                depth += 1
+            elif c == close_c:
+                depth -= 1
+                if depth == 0:
+                    return s[start:i + 1]
+        return None
+
+    @classmethod
+    async def close_client(cls):
+        """Close the shared httpx client (called on app shutdown)."""
+        if cls._client is not None and not cls._client.is_closed:
+            await cls._client.aclose()
+        cls._client = None
+
     async def is_product_match(self, product_name: str, product_description: str, search_query: str) -> bool:
         prompt = f"""
         You are a shopping assistant. Product Name: {product_name}\nProduct Description: {product_description}\nUser's Search Query: {search_query}\nIs this product a good match for the user's search query? Answer only yes or no.
@@ -58,19 +198,17 @@ class AIHelper:
     async def extract_product_details(self, html_content: str, url: str, query: str) -> Dict[str, Any]:
         if not html_content:
             return None
-        truncated_html = html_content[:10000] + "..." if len(html_content) > 10000 else html_content
+        truncated_html = compact_html(html_content, 10000)
         prompt = f"""
         You are a web scraping assistant. Extract product information from the HTML below.\nProduct Page URL: {url}\nSearch Query: {query}\nHTML Content (truncated):\n{truncated_html}\nReturn JSON with: productName, price, currency, imageUrl, additionalInfo. Use null for missing fields.
         """
         answer = await self._call_gemini(prompt)
-        import json
         try:
             # Try to extract JSON from the answer
-            import re
-            match = re.search(r'\{.*\}', answer, re.DOTALL)
-            if match:
-                answer = match.group(0)
-            return json.loads(answer)
+            blob = self._extract_json_blob(answer, '{', '}')
+            if blob:
+                answer = blob
+            return orjson.loads(answer)
         except Exception as e:
             logger.error(f"Failed to parse Gemini JSON: {e}\nRaw: {answer}")
             return None 
\ No newline at end of file
@@ -9,43 +9,90 @@ Usage:
     from src.utils.google_custom_search import search_products_google
     results = await search_products_google(query, country, api_key, cse_id)
 """
+import asyncio
+import hashlib
 import os
 import aiohttp
+import orjson
 import re
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from src.utils.logger import get_logger
 from src.utils.ai_helper import AIHelper
 
 logger = get_logger(__name__)
 ai_helper = AIHelper()
 
-# Regular expressions for price extraction
-PRICE_PATTERNS = [
+# Shared aiohttp session for the Custom Search API, created lazily and reused
+# so the TLS connection to googleapis.com stays warm between queries
+_session: Optional[aiohttp.ClientSession] = None
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Get the shared aiohttp session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=50,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            ),
+            timeout=aiohttp.ClientTimeout(total=15),
+        )
+    return _session
+
+async def close_search_session():
+    """Close the shared aiohttp session (called on app shutdown)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+# Regular expressions for price extraction, compiled once at import so the
+# hot per-item loop skips the re-cache lookup on every call
+PRICE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
     r'[\$\£\€\¥\₹]\s*[\d,]+\.?\d*',  # $123.45, $1,234.56
     r'[\d,]+\.?\d*\s*[\$\£\€\¥\₹]',  # 123.45$, 1,234.56$
     r'[\d,]+\.?\d*\s*USD|EUR|GBP|JPY|INR',  # 123.45 USD
-    r'price[^\d]*[\$\£\€\¥\₹]?\s*[\d,]+\.?\d*',  # price: $123.45, price $123
-    r'price[^\d]*[\d,]+\.?\d*\s*[\$\£\€\¥\₹]?',  # price: 123.45$, price 123
-    r'[\$\£\€\¥\₹]?[^\d]*[\d,]+\.?\d*',  # $123.45, 123.45
-    r'cost[^\d]*[\$\£\€\¥\₹]?\s*[\d,]+\.?\d*',  # cost: $123.45
+    r'price[^\d\x1f]*[\$\£\€\¥\₹]?\s*[\d,]+\.?\d*',  # price: $123.45, price $123
+    r'price[^\d\x1f]*[\d,]+\.?\d*\s*[\$\£\€\¥\₹]?',  # price: 123.45$, price 123
+    r'[\$\£\€\¥\₹]?[^\d\x1f]*[\d,]+\.?\d*',  # $123.45, 123.45
+    r'cost[^\d\x1f]*[\$\£\€\¥\₹]?\s*[\d,]+\.?\d*',  # cost: $123.45
     r'[\d,]+\.?\d*\s*dollars|rupees|euros|pounds',  # 123.45 dollars
     r'starting at\s*[\$\£\€\¥\₹]?\s*[\d,]+\.?\d*',  # starting at $123.45
     r'from\s*[\$\£\€\¥\₹]?\s*[\d,]+\.?\d*',  # from $123.45
-]
+)]
+
+# Compiled price shapes tried in priority order — explicit symbol, then
+# currency code, then labelled number — covering the common cases before the
+# loose PRICE_PATTERNS fallback. Priority matters: a labelled bare number
+# early in the text ("from 500 stores") must not beat an explicit "$150"
+# later on, so these stay separate searches rather than one alternation.
+_PRICE_RES = (
+    re.compile(r'[\$\£\€\¥\₹]\s*[\d,]+\.?\d*'),
+    re.compile(r'[\d,]+\.?\d*\s*(?:USD|EUR|GBP|JPY|INR)', re.IGNORECASE),
+    re.compile(
+        # \x1f excluded so a label can't reach across the sentinel that
+        # _parse_item joins title/snippet/description with
+        r'(?:price|cost|from|starting at)[^\d\x1f]*[\$\£\€\¥\₹]?\s*[\d,]+\.?\d*'
+        r'(?:\s*(?:USD|EUR|GBP|JPY|INR))?',
+        re.IGNORECASE,
+    ),
+)
+
+# "Since 1848" style year mentions
+_SINCE_YEAR_RE = re.compile(r'[Ss]ince\s+(\d{4})')
 
-CURRENCY_MAP = {
+# Currency symbols and codes, split so symbol detection can dispatch on the
+# first character before falling back to substring scans
+_SYM_TO_CCY = {
     '$': 'USD',
     '£': 'GBP',
     '€': 'EUR',
     '¥': 'JPY',
     '₹': 'INR',
-    'USD': 'USD',
-    'EUR': 'EUR',
-    'GBP': 'GBP',
-    'JPY': 'JPY',
-    'INR': 'INR',
 }
+_CCY_CODES = ('USD', 'EUR', 'GBP', 'JPY', 'INR')
 
 # Country to currency mapping
 COUNTRY_CURRENCY = {
@@ -62,77 +109,218 @@ COUNTRY_CURRENCY = {
     'au': 'AUD',
 }
 
+# Default field values merged under sparse Gemini results
+_RESULT_DEFAULTS = {
+    'link': '',
+    'price': '',
+    'currency': '',
+    'productName': '',
+    'source': '',
+    'imageUrl': '',
+    'additionalInfo': None,
+}
+
+# Founding years of common watch brands, never prices
+_WATCH_FOUNDING_YEARS = frozenset({1755, 1848, 1926, 1884, 1875, 1905})
+
+# All the year contexts in one alternation with the year captured, so one pass
+# over the text replaces eleven per-candidate searches
+# Longest slice of a text field the price/year regexes will scan
+_MAX_SCAN = 512
+
+# Deletes every ASCII character except digits, dot and comma in one C-level pass
+_STRIP_TBL = str.maketrans("", "", "".join(chr(i) for i in range(128) if chr(i) not in "0123456789.,"))
+
+_YEAR_CONTEXT_RE = re.compile(
+    r'\b(?:since|est\.?|established|founded|in|from)\s+(\d{4})\b'
+    r'|\b(\d{4})\s*(?:®|edition\b|collection\b)',
+    re.IGNORECASE,
+)
+
 def is_likely_year_not_price(price_str: str, text: str) -> bool:
     """Check if a numeric string is likely a year rather than a price."""
-    # If empty or not a valid number, it's not a year
-    if not price_str or not price_str.isdigit():
+    # Years are exactly four digits; anything else can't be one
+    if len(price_str) != 4 or not price_str.isdigit():
         return False
-        
+
+    if len(text) > _MAX_SCAN:
+        text = text[:_MAX_SCAN]
+
     price_num = int(price_str)
-    
+
     # If the price is a 4-digit number between 1800 and 2030, check if it appears in context as a year
     if 1800 <= price_num <= 2030:
-        # Check if the number appears in the text with year context
-        year_patterns = [
-            rf"since\s*{price_str}",
-            rf"est\.?\s*{price_str}",
-            rf"established\s*{price_str}",
-            rf"founded\s*{price_str}",
-            rf"{price_str}\s*®",
-            rf"watches since {price_str}",
-            rf"since\s+{price_str}",
-            rf"in\s+{price_str}",
-            rf"from\s+{price_str}",
-            rf"{price_str}\s+[Ee]dition",
-            rf"{price_str}\s+[Cc]ollection",
-        ]
-        
+        # Known watch founding years: a cheap set test before any regex work
+        if price_num in _WATCH_FOUNDING_YEARS and "watch" in text.lower():
+            logger.debug(f"Detected known watch brand founding year {price_str}")
+            return True
+
         # Check if the number appears in product name or title as a year
-        for pattern in year_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for match in _YEAR_CONTEXT_RE.finditer(text):
+            if price_str in match.groups():
                 logger.debug(f"Detected year {price_str} in text: {text[:50]}...")
                 return True
-                
-        # Special case: if the number is exactly 1755, 1848, 1926 (common watch founding years)
-        if price_num in [1755, 1848, 1926, 1884, 1875, 1905]:
-            if "watches" in text.lower() or "watch" in text.lower():
-                logger.debug(f"Detected known watch brand founding year {price_str}")
-                return True
-    
+
     return False
 
+def _detect_currency(price_str: str) -> str:
+    """Map a matched price string to a currency code."""
+    # Most matches start with the symbol, so try a direct first-char lookup
+    currency = _SYM_TO_CCY.get(price_str[:1])
+    if currency:
+        return currency
+    for symbol, code in _SYM_TO_CCY.items():
+        if symbol in price_str:
+            return code
+    for code in _CCY_CODES:
+        if code in price_str:
+            return code
+    return ''
+
+def _finalize_candidate(price_str: str, text: str) -> tuple:
+    """Clean a matched price string and reject years; None if not usable."""
+    # Extract currency symbol or code
+    currency = _detect_currency(price_str)
+
+    # Clean up price string to just numbers, then drop trailing punctuation
+    if price_str.isascii():
+        price = price_str.translate(_STRIP_TBL)
+    else:
+        # Currency symbols land outside ASCII; take the slow path
+        price = ''.join(c for c in price_str if c.isdigit() or c in ".,")
+    price = price.rstrip('.,')
+    # If price is empty after cleaning, it's not usable
+    if not price:
+        return None
+
+    # Check if this is likely a year rather than a price
+    if is_likely_year_not_price(price, text):
+        return None
+
+    return price, currency
+
 def extract_price_from_text(text: str) -> tuple:
     """Extract price and currency from text using regex patterns."""
     if not text:
         return '', ''
-    
+
+    # CSE snippets are short, but og:description can run to multiple KB;
+    # cap the scan so per-item cost stays bounded
+    if len(text) > _MAX_SCAN:
+        text = text[:_MAX_SCAN]
+
+    # Fast path: the common price shapes, in priority order
+    for pattern in _PRICE_RES:
+        match = pattern.search(text)
+        if match:
+            found = _finalize_candidate(match.group(0), text)
+            if found:
+                return found
+
     for pattern in PRICE_PATTERNS:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+        matches = pattern.findall(text)
         if matches:
-            price_str = matches[0]
-            # Extract currency symbol or code
-            currency = ''
-            for symbol, code in CURRENCY_MAP.items():
-                if symbol in price_str:
-                    currency = code
-                    break
-            
-            # Clean up price string to just numbers
-            price = re.sub(r'[^\d.,]', '', price_str)
-            # Remove trailing dots or commas
-            price = price.rstrip('.,')
-            # If price is empty after cleaning, skip
-            if not price:
-                continue
-                
-            # Check if this is likely a year rather than a price
-            if is_likely_year_not_price(price, text):
-                continue
-                
-            return price, currency
-    
+            found = _finalize_candidate(matches[0], text)
+            if found:
+                return found
+
     return '', ''
 
+def _has_structured_price(item: Dict[str, Any]) -> bool:
+    """Check whether an item's pagemap offer/product carries an actual price.
+
+    A bare offer or product entry without a price still needs the regex or
+    Gemini fallback, so mere presence isn't enough.
+    """
+    pagemap = item.get('pagemap', {})
+    offer = pagemap.get('offer') or [{}]
+    product = pagemap.get('product') or [{}]
+    return bool(offer[0].get('price') or product[0].get('price'))
+
+def _parse_item(item: Dict[str, Any], default_currency: str) -> Optional[Dict[str, Any]]:
+    """Build one result dict from a Custom Search item; None on error.
+
+    Pure CPU work (dict digging and regex scans), safe to run in a thread.
+    """
+    try:
+        # Try to extract product info from snippet, pagemap, etc.
+        pagemap = item.get('pagemap', {})
+        product = pagemap.get('product', [{}])[0] if 'product' in pagemap else {}
+        offer = pagemap.get('offer', [{}])[0] if 'offer' in pagemap else {}
+        metatags = pagemap.get('metatags', [{}])[0] if 'metatags' in pagemap else {}
+
+        # Extract price from structured data
+        price = offer.get('price') or product.get('price') or ''
+        currency = offer.get('pricecurrency') or product.get('pricecurrency') or ''
+
+        # If no structured price, try to extract from title, snippet, or description
+        if not price:
+            title = item.get('title', '')
+            snippet = item.get('snippet', '')
+            desc = item.get('pagemap', {}).get('metatags', [{}])[0].get('og:description', '')
+
+            # Check for years in title and snippet to avoid misidentifying them as prices
+            full_text = f"{title} {snippet} {desc}"
+
+            # Extract "Since XXXX" pattern and skip if found
+            since_year_match = _SINCE_YEAR_RE.search(full_text)
+            if since_year_match:
+                logger.debug(f"Skipping 'Since {since_year_match.group(1)}' in {item.get('title')}")
+                # Don't use this number as price
+            else:
+                # One scan over the three fields joined with a unit separator
+                # (a char no price pattern can match across) instead of three
+                # separate regex passes; extract_price_from_text already
+                # rejects year-like values, so no second
+                # is_likely_year_not_price pass is needed here
+                combined = f"{title}\x1f{snippet}\x1f{desc}"
+                price, currency = extract_price_from_text(combined)
+                currency = currency or default_currency
+
+        # Always set the default currency if none found
+        if not currency:
+            currency = default_currency
+
+        # Special case: check if product name contains "Since XXXX" and price matches that year
+        if price and "since" in item.get('title', '').lower() + item.get('snippet', '').lower():
+            year_match = _SINCE_YEAR_RE.search(item.get('title', '') + item.get('snippet', ''))
+            if year_match and price == year_match.group(1):
+                logger.debug(f"Clearing price {price} that matches 'Since XXXX' year")
+                price = ''
+
+        # Extract image URL
+        image_url = ''
+        if 'cse_image' in pagemap and pagemap['cse_image']:
+            image_url = pagemap['cse_image'][0].get('src', '')
+        elif 'imageobject' in pagemap and pagemap['imageobject']:
+            image_url = pagemap['imageobject'][0].get('url', '')
+        elif 'og:image' in metatags:
+            image_url = metatags.get('og:image', '')
+
+        # Extract product name
+        product_name = product.get('name') or metatags.get('og:title') or item.get('title', '')
+
+        # Create result; the `or ''` folds the None check and the fallback
+        # into the construction, so no fix-up loop runs afterwards
+        return {
+            'link': item.get('link') or '',
+            'price': price or '',
+            'currency': currency or '',
+            'productName': product_name or '',
+            'source': item.get('displayLink') or '',
+            'imageUrl': image_url or '',
+            'additionalInfo': {
+                'snippet': item.get('snippet', ''),
+                'brand': product.get('brand') or metatags.get('og:brand', ''),
+                'rating': product.get('ratingvalue', ''),
+                'reviews': product.get('reviewcount', ''),
+            }
+        }
+    except Exception as e:
+        logger.error(f"Error processing search result: {e}")
+        return None
+
+
 async def search_products_google(query: str, country: str, api_key: str = None, cse_id: str = None) -> List[Dict[str, Any]]:
     """Search for products using Google Custom Search API."""
     api_key = api_key or os.getenv('GOOGLE_CUSTOM_SEARCH_API_KEY')
@@ -151,139 +339,104 @@ async def search_products_google(query: str, country: str, api_key: str = None,
         'q': f"{query} price buy online",  # Optimize query for product search
         'gl': country_code,  # country code
         'num': 10,
+        # Partial response: only the fields _parse_item and the Gemini
+        # fallback actually read, which shrinks the JSON body substantially
+        'fields': 'items(link,title,snippet,displayLink,pagemap(offer,product,metatags,cse_image,imageobject))',
     }
     
     results = []
     logger.info(f"Querying Google Custom Search API for '{query}' in {country}")
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, params=params, timeout=15) as resp:
-                if resp.status != 200:
-                    text = await resp.text()
-                    logger.error(f"Google Custom Search API error: {resp.status} {text}")
-                    raise Exception(f"Google Custom Search API error: {resp.status} {text}")
-                
-                data = await resp.json()
-                logger.info(f"Google Custom Search returned {len(data.get('items', []))} results")
-                
-                for item in data.get('items', []):
-                    try:
-                        # Try to extract product info from snippet, pagemap, etc.
-                        pagemap = item.get('pagemap', {})
-                        product = pagemap.get('product', [{}])[0] if 'product' in pagemap else {}
-                        offer = pagemap.get('offer', [{}])[0] if 'offer' in pagemap else {}
-                        metatags = pagemap.get('metatags', [{}])[0] if 'metatags' in pagemap else {}
-                        
-                        # Extract price from structured data
-                        price = offer.get('price') or product.get('price') or ''
-                        currency = offer.get('pricecurrency') or product.get('pricecurrency') or ''
-                        
-                        # If no structured price, try to extract from title, snippet, or description
-                        if not price:
-                            title = item.get('title', '')
-                            snippet = item.get('snippet', '')
-                            desc = item.get('pagemap', {}).get('metatags', [{}])[0].get('og:description', '')
-                            
-                            # Check for years in title and snippet to avoid misidentifying them as prices
-                            full_text = f"{title} {snippet} {desc}"
-                            
-                            # Extract "Since XXXX" pattern and skip if found
-                            since_year_match = re.search(r'[Ss]ince\s+(\d{4})', full_text)
-                            if since_year_match:
-                                logger.debug(f"Skipping 'Since {since_year_match.group(1)}' in {item.get('title')}")
-                                # Don't use this number as price
-                            else:
-                                title_price, title_currency = extract_price_from_text(title)
-                                snippet_price, snippet_currency = extract_price_from_text(snippet)
-                                desc_price, desc_currency = extract_price_from_text(desc)
-                                
-                                # Check if any extracted price is actually a year
-                                if title_price and is_likely_year_not_price(title_price, full_text):
-                                    logger.debug(f"Skipping likely year {title_price} in {title}")
-                                    title_price = ''
-                                    
-                                if snippet_price and is_likely_year_not_price(snippet_price, full_text):
-                                    logger.debug(f"Skipping likely year {snippet_price} in snippet")
-                                    snippet_price = ''
-                                    
-                                price = title_price or snippet_price or desc_price
-                                currency = title_currency or snippet_currency or desc_currency or default_currency
-                        
-                        # Always set the default currency if none found
-                        if not currency:
-                            currency = default_currency
-                            
-                        # Special case: check if product name contains "Since XXXX" and price matches that year
-                        if price and "since" in item.get('title', '').lower() + item.get('snippet', '').lower():
-                            year_match = re.search(r'[Ss]ince\s+(\d{4})', item.get('title', '') + item.get('snippet', ''))
-                            if year_match and price == year_match.group(1):
-                                logger.debug(f"Clearing price {price} that matches 'Since XXXX' year")
-                                price = ''
-                        
-                        # Extract image URL
-                        image_url = ''
-                        if 'cse_image' in pagemap and pagemap['cse_image']:
-                            image_url = pagemap['cse_image'][0].get('src', '')
-                        elif 'imageobject' in pagemap and pagemap['imageobject']:
-                            image_url = pagemap['imageobject'][0].get('url', '')
-                        elif 'og:image' in metatags:
-                            image_url = metatags.get('og:image', '')
-                        
-                        # Extract product name
-                        product_name = product.get('name') or metatags.get('og:title') or item.get('title', '')
-                        
-                        # Create result
-                        result = {
-                            'link': item.get('link', ''),
-                            'price': price,
-                            'currency': currency,
-                            'productName': product_name,
-                            'source': item.get('displayLink', ''),
-                            'imageUrl': image_url,
-                            'additionalInfo': {
-                                'snippet': item.get('snippet', ''),
-                                'brand': product.get('brand') or metatags.get('og:brand', ''),
-                                'rating': product.get('ratingvalue', ''),
-                                'reviews': product.get('reviewcount', ''),
-                            }
-                        }
-                        
-                        # Ensure all required fields are strings
-                        for k in ['link', 'price', 'currency', 'productName', 'source', 'imageUrl']:
-                            if result[k] is None:
-                                result[k] = ''
-                        
-                        results.append(result)
-                    except Exception as e:
-                        logger.error(f"Error processing search result: {e}")
-                
-                # If we have few results with price info, try using Gemini to extract more
-                price_results = [r for r in results if r.get('price')]
-                if len(price_results) < 3 and ai_helper.api_key and data.get('items'):
-                    logger.info(f"Few structured price results found ({len(price_results)} of {len(results)}), using Gemini to extract more")
-                    try:
-                        gemini_results = await extract_with_gemini(data.get('items'), query, country_code)
-                        if gemini_results:
-                            # Merge with existing results, avoiding duplicates by URL
-                            existing_urls = {r['link'] for r in results}
-                            for r in gemini_results:
-                                if r['link'] not in existing_urls:
-                                    results.append(r)
-                                    existing_urls.add(r['link'])
-                    except Exception as e:
-                        logger.error(f"Error using Gemini to extract product info: {e}")
-        
-        except Exception as e:
-            logger.error(f"Error querying Google Custom Search API: {e}")
+    session = await _get_session()
+    try:
+        async with session.get(url, params=params, timeout=15) as resp:
+            if resp.status != 200:
+                text = await resp.text()
+                logger.error(f"Google Custom Search API error: {resp.status} {text}")
+                raise Exception(f"Google Custom Search API error: {resp.status} {text}")
+            
+            data = await resp.json(loads=orjson.loads)
+            logger.info(f"Google Custom Search returned {len(data.get('items', []))} results")
+            
+            items = data.get('items', [])
+
+            # Decide the Gemini fallback up front from the structured data
+            # alone, so its network round trip overlaps the per-item parsing
+            # instead of starting after it
+            structured_count = sum(1 for it in items if _has_structured_price(it))
+            gemini_task = None
+            if structured_count < 3 and ai_helper.api_key and items:
+                logger.info(f"Few structured price results found ({structured_count} of {len(items)}), using Gemini to extract more")
+                gemini_task = asyncio.create_task(extract_with_gemini(items, query, country_code))
+
+            # Parse items concurrently: each parse is a pure-Python regex
+            # scan, so fan the work out to threads and collect in order
+            parsed = await asyncio.gather(
+                *(asyncio.to_thread(_parse_item, item, default_currency) for item in items)
+            )
+            results.extend(r for r in parsed if r)
+
+            if gemini_task is not None:
+                try:
+                    gemini_results = await gemini_task
+                    if gemini_results:
+                        # Merge by URL, keeping the parsed result when both
+                        # sources found the same page; dicts preserve order
+                        by_url = {r['link']: r for r in results}
+                        for r in gemini_results:
+                            by_url.setdefault(r['link'], r)
+                        results = list(by_url.values())
+                except Exception as e:
+                    logger.error(f"Error using Gemini to extract product info: {e}")
+    
+    except Exception as e:
+        logger.error(f"Error querying Google Custom Search API: {e}")
     
     logger.info(f"Returning {len(results)} products from Google Custom Search")
     return results
 
+# Memoized Gemini extractions: a retried query re-uses the parsed result
+# instead of repeating the API round trip, keyed on the query plus a short
+# hash of the item links actually sent in the prompt
+_gemini_cache: Dict[tuple, List[Dict[str, Any]]] = {}
+_GEMINI_CACHE_MAX = 256
+_gemini_locks: Dict[tuple, asyncio.Lock] = {}
+_gemini_lock_guard = asyncio.Lock()
+
 async def extract_with_gemini(search_items, query, country_code):
-    """Use Gemini to extract product information from search results."""
+    """Use Gemini to extract product information from search results, memoized."""
     if not ai_helper.api_key:
         return []
+    items_sig = hashlib.blake2b(
+        ''.join(it.get('link', '') for it in search_items[:5]).encode(),
+        digest_size=8,
+    ).hexdigest()
+    key = (query, country_code, items_sig)
+    cached = _gemini_cache.get(key)
+    if cached is not None:
+        return cached
+    # Per-key lock so concurrent identical requests make one API call
+    async with _gemini_lock_guard:
+        lock = _gemini_locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            cached = _gemini_cache.get(key)
+            if cached is not None:
+                return cached
+            results = await _extract_with_gemini_uncached(search_items, query, country_code)
+            if results:
+                if len(_gemini_cache) >= _GEMINI_CACHE_MAX:
+                    _gemini_cache.clear()
+                _gemini_cache[key] = results
+            return results
+    finally:
+        # The lock only needs to exist while the first call is in flight;
+        # dropping it here keeps the dict from growing one entry per
+        # distinct key forever
+        _gemini_locks.pop(key, None)
+
+async def _extract_with_gemini_uncached(search_items, query, country_code):
+    """Run the actual Gemini extraction; see extract_with_gemini."""
     
     try:
         # Prepare search results for Gemini
@@ -301,7 +454,7 @@ async def extract_with_gemini(search_items, query, country_code):
         prompt = f"""
         You are a product information extractor specializing in finding prices. I have search results for "{query}" from {country_code}.
         Extract product information from these search results:
-        {json.dumps(search_data, indent=2)}
+        {orjson.dumps(search_data, option=orjson.OPT_INDENT_2).decode()}
         
         For each result, extract:
         1. Product name
@@ -324,32 +477,30 @@ async def extract_with_gemini(search_items, query, country_code):
         answer = await ai_helper._call_gemini(prompt)
         logger.debug(f"Gemini raw answer: {answer}")
         
-        # Extract JSON from Gemini's response
-        import re
-        match = re.search(r'\[.*\]', answer, re.DOTALL)
-        if match:
-            answer = match.group(0)
-            
+        # Extract JSON from Gemini's response with the bracket scanner; unlike
+        # the old greedy regex it won't span unrelated bracket pairs in prose
+        blob = ai_helper._extract_json_blob(answer)
+        if blob:
+            answer = blob
+
+
         try:
-            parsed_results = json.loads(answer)
+            try:
+                parsed_results = orjson.loads(answer)
+            except orjson.JSONDecodeError:
+                # Gemini sometimes emits loose JSON orjson rejects
+                parsed_results = json.loads(answer)
             logger.debug(f"Gemini parsed_results: {parsed_results}")
             results = []
             
             if isinstance(parsed_results, list):
                 for item in parsed_results:
                     if isinstance(item, dict) and "link" in item:
-                        # Ensure required fields exist
-                        for field in ["productName", "price", "currency", "link", "source"]:
-                            if field not in item:
-                                item[field] = ""
-                        
-                        # Add imageUrl and additionalInfo if missing
-                        if "imageUrl" not in item:
-                            item["imageUrl"] = ""
-                        if "additionalInfo" not in item:
-                            item["additionalInfo"] = {}
-                            
-                        results.append(item)
+                        # Fill any missing fields in a single merge
+                        merged = {**_RESULT_DEFAULTS, **item}
+                        if merged["additionalInfo"] is None:
+                            merged["additionalInfo"] = {}
+                        results.append(merged)
             
             logger.info(f"Extracted {len(results)} products with Gemini")
             return results
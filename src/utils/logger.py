@@ -1,42 +1,48 @@
+import atexit
 import logging
 import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # Create logs directory if it doesn't exist
 logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "logs")
 if not os.path.exists(logs_dir):
     os.makedirs(logs_dir)
 
+# One real console/file handler pair shared by every logger; a background
+# QueueListener does the actual I/O so a log call on the event loop is just a
+# queue put instead of a blocking disk write
+_log_queue = queue.SimpleQueue()
+
+_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+_console_handler = logging.StreamHandler(sys.stdout)
+_console_handler.setFormatter(_formatter)
+
+_file_handler = RotatingFileHandler(
+    os.path.join(logs_dir, 'app.log'),
+    maxBytes=10*1024*1024,  # 10MB
+    backupCount=5
+)
+_file_handler.setFormatter(_formatter)
+
+_listener = QueueListener(_log_queue, _console_handler, _file_handler)
+_listener.start()
+atexit.register(_listener.stop)
+
 # Configure the logger
 def get_logger(name, level=logging.INFO):
     """Get a configured logger instance."""
     logger = logging.getLogger(name)
-    
+
     if logger.hasHandlers():
         return logger
-        
+
     logger.setLevel(level)
-    
-    # Create console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
-    
-    # Create file handler
-    file_handler = RotatingFileHandler(
-        os.path.join(logs_dir, 'app.log'), 
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
-    )
-    file_handler.setLevel(level)
-    
-    # Create formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
-    
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    
-    return logger 
\ No newline at end of file
+
+    # Only the queue handler attaches to the logger; the listener fans out
+    # to the console and file handlers on its own thread
+    logger.addHandler(QueueHandler(_log_queue))
+
+    return logger
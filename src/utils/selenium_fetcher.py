@@ -1,10 +1,33 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selectolax.lexbor import LexborHTMLParser
 from webdriver_manager.chrome import ChromeDriverManager
-import time
+from contextlib import contextmanager
+import os
+import queue
+import threading
+from src.utils.logger import get_logger
 
-def fetch_html_selenium(url: str, timeout: int = 15) -> str:
+logger = get_logger(__name__)
+
+# Chromedriver install path, resolved once per process instead of hitting
+# webdriver-manager (disk and potentially network) on every fetch
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def _get_driver_path() -> str:
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+def _build_options() -> Options:
     options = Options()
     options.add_argument('--headless')
     options.add_argument('--disable-gpu')
@@ -13,14 +36,121 @@ def fetch_html_selenium(url: str, timeout: int = 15) -> str:
     options.add_argument('--window-size=1920,1080')
     options.add_argument('--disable-blink-features=AutomationControlled')
     options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.set_page_load_timeout(timeout)
+    return options
+
+def looks_server_rendered(html) -> bool:
+    """Heuristic check that a plain HTTP fetch already carries price markup.
+
+    Pages shipping JSON-LD or OpenGraph price tags don't need a JS render,
+    so callers can skip the Selenium fallback entirely. Accepts str or bytes.
+    """
+    if not html:
+        return False
+    try:
+        tree = LexborHTMLParser(html)
+        return bool(
+            tree.css_first('script[type="application/ld+json"]')
+            or tree.css_first('meta[property="og:price:amount"]')
+            or tree.css_first('meta[property="product:price:amount"]')
+        )
+    except Exception:
+        return False
+
+class SeleniumPool:
+    """Pool of recycled headless Chrome drivers.
+
+    Chrome startup costs 1-2 seconds per instance; keeping drivers alive and
+    reusing them amortizes that to near-zero after the first fetch.
+    """
+
+    def __init__(self, max_drivers: int = 2):
+        self.max_drivers = max_drivers
+        self._pool: queue.Queue = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create_driver(self):
+        return webdriver.Chrome(service=Service(_get_driver_path()), options=_build_options())
+
+    def _discard(self, driver):
+        with self._lock:
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a driver from the pool, creating one if below the limit."""
+        driver = None
+        while driver is None:
+            try:
+                driver = self._pool.get_nowait()
+                break
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._created < self.max_drivers:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    driver = self._create_driver()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                # All drivers are busy; wait briefly, then re-check capacity —
+                # a busy driver may have been discarded on error rather than
+                # returned, in which case we must create its replacement
+                # ourselves instead of blocking forever
+                try:
+                    driver = self._pool.get(timeout=1)
+                except queue.Empty:
+                    continue
+        try:
+            yield driver
+        except Exception:
+            # A failed fetch may leave the driver wedged; don't recycle it
+            self._discard(driver)
+            raise
+        try:
+            driver.delete_all_cookies()
+        except Exception:
+            self._discard(driver)
+            return
+        self._pool.put(driver)
+
+    def close(self):
+        """Quit all idle drivers (best effort, e.g. on shutdown)."""
+        while True:
+            try:
+                driver = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+_pool = SeleniumPool(max_drivers=int(os.getenv("SELENIUM_POOL_SIZE", "2")))
+
+def close_selenium_pool():
+    """Quit all pooled drivers (called on app shutdown)."""
+    _pool.close()
+
+def fetch_html_selenium(url: str, timeout: int = 15) -> str:
     try:
-        driver.get(url)
-        time.sleep(3)  # Let JS render
-        html = driver.page_source
+        with _pool.acquire() as driver:
+            driver.set_page_load_timeout(timeout)
+            driver.get(url)
+            # Wait only as long as the page actually needs instead of a
+            # fixed sleep
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.TAG_NAME, 'body'))
+            )
+            return driver.page_source
     except Exception as e:
-        html = ""
-    finally:
-        driver.quit()
-    return html 
\ No newline at end of file
+        logger.error(f"Selenium fetch failed for {url}: {e}")
+        return ""